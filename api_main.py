@@ -4,23 +4,58 @@ FastAPI entrypoint for the Reel Extraction API and HTML UI pages.
 Run with:
 
     uvicorn api_main:app --reload
+
+In production, use uvloop and httptools (both in requirements.txt) and
+turn off the per-request access log:
+
+    uvicorn api_main:app --loop uvloop --http httptools --no-access-log
 """
 
+import asyncio
+import functools
+import gzip
+import zlib
 from pathlib import Path
 
-from fastapi import FastAPI
+import anyio.to_thread
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, RedirectResponse, Response
+from starlette.concurrency import run_in_threadpool
 
 from src.api import reels as reels_api
 from src.api import product_lens as product_lens_api
 from src.api import agent_actions as agent_actions_api
+from src.api import supermemory_http
+from src.services.gemini_model_helper import warm_up_gemini_models
+from src.utils import json_utils
+from main import get_extractor
 
 
 BASE_DIR = Path(__file__).resolve().parent
 
+# HTML templates served by the UI page handlers below.
+REEL_INPUT_HTML = "src/models/UI elements/reel_input/code.html"
+BROWSE_REELS_HTML = "src/models/UI elements/browse_reels/code.html"
+PROCESSING_STATUS_HTML = "src/models/UI elements/processing_status/code.html"
+GENERIC_VIEW_HTML = "src/code.html"
+EXTRACTED_VIEW_HTML = "src/models/UI elements/extracted_data_display_1/code.html"
+
+HTML_PAGES = (
+    REEL_INPUT_HTML,
+    BROWSE_REELS_HTML,
+    PROCESSING_STATUS_HTML,
+    GENERIC_VIEW_HTML,
+    EXTRACTED_VIEW_HTML,
+)
+
 
-app = FastAPI(title="Reel Extraction API")
+# API responses (reels with nested extractions and keyframe lists) are
+# rendered by orjson when it is installed.
+app = FastAPI(
+    title="Reel Extraction API",
+    default_response_class=ORJSONResponse if json_utils.ORJSON_AVAILABLE else JSONResponse,
+)
 
 app.include_router(reels_api.router)
 app.include_router(product_lens_api.router)
@@ -33,13 +68,55 @@ from src.utils.config import Config  # local import to avoid circulars at top-le
 # Ensure temp_storage directory exists before mounting
 Config.ensure_temp_storage()
 
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers cache every file for a year without revalidating.
+
+    Only safe for write-once paths: keyframes live under
+    `keyframes_<uuid>/`, so a new extraction always gets a new URL.
+    """
+
+    CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = self.CACHE_CONTROL
+        return response
+
+
 app.mount(
     "/temp",
-    StaticFiles(directory=str(Config.TEMP_STORAGE_PATH)),
+    ImmutableStaticFiles(directory=str(Config.TEMP_STORAGE_PATH)),
     name="temp",
 )
 
 
+@app.on_event("shutdown")
+def _close_extractor() -> None:
+    """Stop extraction workers and close the shared extractor's clients."""
+    reels_api.shutdown_extraction_pool()
+    if get_extractor.cache_info().currsize:
+        get_extractor().close()
+
+
+@app.on_event("shutdown")
+async def _close_http_clients() -> None:
+    """Close the routers' shared Supermemory / SerpApi HTTP clients."""
+    await supermemory_http.close_sm_client()
+    await product_lens_api.close_http_clients()
+
+
+@app.get("/metrics")
+async def metrics() -> dict:
+    """Sizes of the process-local stores and caches, for spotting unbounded growth."""
+    return {
+        **reels_api.store_sizes(),
+        "supermemory_cache": supermemory_http.cache_size(),
+        "lens_cache": product_lens_api.cache_size(),
+    }
+
+
 @app.get("/", include_in_schema=False)
 async def root_redirect():
     """
@@ -48,47 +125,180 @@ async def root_redirect():
     return RedirectResponse(url="/reel-input")
 
 
+@functools.lru_cache(maxsize=None)
 def _load_html(relative_path: str) -> str:
-    """Utility to load an HTML file from the repo."""
+    """
+    Utility to load an HTML file from the repo.
+
+    Templates are static for the lifetime of the process, so each file is
+    read once and served from memory afterwards.
+    """
     html_path = BASE_DIR / relative_path
     return html_path.read_text(encoding="utf-8")
 
 
+@functools.lru_cache(maxsize=None)
+def _html_etag(relative_path: str) -> str:
+    """Strong ETag for a cached template, derived from a CRC32 of its body."""
+    body = _load_html(relative_path).encode("utf-8")
+    return f'"{zlib.crc32(body):08x}-{len(body):x}"'
+
+
+@functools.lru_cache(maxsize=None)
+def _html_gzip(relative_path: str) -> bytes:
+    """Pre-compressed body of a cached template, built once per process."""
+    return gzip.compress(_load_html(relative_path).encode("utf-8"), compresslevel=9)
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """True when the client advertises gzip support in Accept-Encoding."""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        params = params.strip()
+        if not params.startswith("q="):
+            return True
+        try:
+            return float(params[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+# Templates whose body, ETag and gzip bytes are already cached in memory.
+_WARM_PAGES: set = set()
+
+
+def _warm_page(relative_path: str) -> None:
+    """Load, hash and compress one template into the in-memory caches."""
+    _html_etag(relative_path)
+    _html_gzip(relative_path)
+    _WARM_PAGES.add(relative_path)
+
+
+async def _html_response(request: Request, relative_path: str) -> Response:
+    """
+    Serve a cached HTML template, honouring conditional GETs.
+
+    Browsers revalidate on every load (`Cache-Control: no-cache`) and get an
+    empty 304 when their copy still matches the template's ETag. Clients that
+    accept gzip receive the pre-compressed body; each encoding carries its
+    own ETag so caches never mix the two representations.
+    """
+    if relative_path not in _WARM_PAGES:
+        # Not preloaded at startup: do the disk read off the event loop.
+        await run_in_threadpool(_warm_page, relative_path)
+
+    use_gzip = _accepts_gzip(request)
+    etag = _html_etag(relative_path)
+    if use_gzip:
+        etag = etag[:-1] + '-gzip"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(_html_gzip(relative_path), media_type="text/html", headers=headers)
+
+    return HTMLResponse(_load_html(relative_path), headers=headers)
+
+
+@app.on_event("startup")
+async def _warm_html_cache() -> None:
+    """Read and compress all UI templates up front so the first load is fast too."""
+    for relative_path in HTML_PAGES:
+        _warm_page(relative_path)
+
+
+@app.on_event("startup")
+async def _check_config() -> None:
+    """
+    Report missing API keys once at startup instead of on each request,
+    and open the shared Supermemory client before the first request.
+    """
+    try:
+        Config.validate()
+    except ValueError as e:
+        print(f"⚠️  {e}; endpoints that need it will return 500")
+    if Config.SUPERMEMEORY_API_KEY:
+        supermemory_http.open_sm_client(Config.SUPERMEMEORY_API_KEY)
+
+
+@app.on_event("startup")
+async def _build_extractor() -> None:
+    """
+    Build the shared ReelExtractor before serving, so the first submission
+    skips service setup and concurrent first requests cannot build two.
+    """
+    try:
+        await run_in_threadpool(get_extractor)
+    except Exception as e:
+        # Missing keys are reported by _check_config; /submit retries the build.
+        print(f"⚠️  ReelExtractor not ready at startup: {e}")
+
+
+@app.on_event("startup")
+async def _raise_thread_limit() -> None:
+    """
+    Size the threadpool behind StaticFiles (keyframe thumbnails) and other
+    sync work to Config.FASTAPI_THREAD_LIMIT instead of Starlette's 40.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = Config.FASTAPI_THREAD_LIMIT
+
+
+@app.on_event("startup")
+async def _log_event_loop() -> None:
+    """Report which event loop is serving requests (uvloop when installed)."""
+    loop = asyncio.get_running_loop()
+    print(f"🔁 Event loop: {type(loop).__module__}.{type(loop).__name__}")
+
+
+@app.on_event("startup")
+async def _warm_gemini_models() -> None:
+    """Resolve Gemini model names in the background so the first plan skips it."""
+    asyncio.get_running_loop().run_in_executor(None, warm_up_gemini_models)
+
+
 @app.get("/reel-input", response_class=HTMLResponse)
-async def reel_input_page() -> HTMLResponse:
+async def reel_input_page(request: Request) -> Response:
     """Landing page where the user pastes an Instagram reel link."""
-    return HTMLResponse(
-        _load_html("src/models/UI elements/reel_input/code.html")
-    )
+    return await _html_response(request, REEL_INPUT_HTML)
 
 
 @app.get("/browse-reels", response_class=HTMLResponse)
-async def browse_reels_page() -> HTMLResponse:
+async def browse_reels_page(request: Request) -> Response:
     """Browse previously saved reels, organized by category."""
-    return HTMLResponse(
-        _load_html("src/models/UI elements/browse_reels/code.html")
-    )
+    return await _html_response(request, BROWSE_REELS_HTML)
 
 @app.get("/processing-status", response_class=HTMLResponse)
-async def processing_status_page() -> HTMLResponse:
+async def processing_status_page(request: Request) -> Response:
     """Processing screen that polls task status."""
-    return HTMLResponse(
-        _load_html("src/models/UI elements/processing_status/code.html")
-    )
+    return await _html_response(request, PROCESSING_STATUS_HTML)
 
 @app.get("/generic-view", response_class=HTMLResponse)
-async def generic_view_page() -> HTMLResponse:
-    return HTMLResponse(
-        _load_html("src/code.html") 
-    )
+async def generic_view_page(request: Request) -> Response:
+    return await _html_response(request, GENERIC_VIEW_HTML)
 
 @app.get("/extracted-view", response_class=HTMLResponse)
-async def extracted_view_page() -> HTMLResponse:
+async def extracted_view_page(request: Request) -> Response:
     """
     Structured extraction detail page.
 
     For now this uses the first extracted_data_display variant.
     """
-    return HTMLResponse(
-        _load_html("src/models/UI elements/extracted_data_display_1/code.html")
-    )
+    return await _html_response(request, EXTRACTED_VIEW_HTML)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # "auto" selects uvloop and httptools whenever they are installed.
+    uvicorn.run(app, host="127.0.0.1", port=8000, loop="auto", http="auto", access_log=False)
@@ -2,6 +2,7 @@
 Quick script to check available Gemini models
 """
 import os
+import sys
 from dotenv import load_dotenv
 import google.generativeai as genai
 
@@ -14,12 +15,15 @@ if not api_key:
 
 genai.configure(api_key=api_key)
 
-print("Available Gemini models:")
-print("=" * 60)
-for model in genai.list_models():
-    if 'generateContent' in model.supported_generation_methods:
-        print(f"  - {model.name}")
-        print(f"    Display name: {model.display_name}")
-        print(f"    Description: {model.description}")
-        print()
+# Fetch the (possibly paginated) listing once, then filter locally.
+models = list(genai.list_models())
+generate_models = [m for m in models if 'generateContent' in m.supported_generation_methods]
 
+lines = ["Available Gemini models:", "=" * 60]
+for model in generate_models:
+    lines.append(f"  - {model.name}")
+    lines.append(f"    Display name: {model.display_name}")
+    lines.append(f"    Description: {model.description}")
+    lines.append("")
+
+sys.stdout.write("\n".join(lines) + "\n")
@@ -7,17 +7,19 @@ Usage:
     python export_instagram_cookies.py
 
 Requirements:
+    - pip install browser-cookie3
     - You must be logged into Instagram in Chrome
     - You'll need to approve macOS keychain access when prompted
 """
 
 import sys
+from http.cookiejar import MozillaCookieJar
 from pathlib import Path
 
 try:
-    import yt_dlp
+    import browser_cookie3
 except ImportError:
-    print("❌ yt-dlp not found. Install it with: pip install yt-dlp")
+    print("❌ browser-cookie3 not found. Install it with: pip install browser-cookie3")
     sys.exit(1)
 
 
@@ -29,21 +31,15 @@ def export_cookies():
     print("⚠️  You may be prompted to enter your Mac password to access Chrome's keychain.")
     print()
     
-    ydl_opts = {
-        'cookiesfrombrowser': ('chrome',),
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': True,
-        'skip_download': True,
-    }
-    
     try:
-        # Use a real Instagram URL to trigger cookie extraction
-        test_url = 'https://www.instagram.com/reel/Cne60hWpOdO/'
+        # Read Instagram cookies straight from Chrome's cookie DB and write
+        # them in the Netscape format that yt-dlp's `cookiefile` expects.
+        chrome_jar = browser_cookie3.chrome(domain_name='.instagram.com')
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Extract cookies
-            ydl.cookiejar.save(str(output_file), ignore_discard=True, ignore_expires=True)
+        jar = MozillaCookieJar(str(output_file))
+        for cookie in chrome_jar:
+            jar.set_cookie(cookie)
+        jar.save(ignore_discard=True, ignore_expires=True)
         
         if output_file.exists() and output_file.stat().st_size > 0:
             print(f"✅ Cookies exported successfully to: {output_file}")
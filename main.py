@@ -1,9 +1,15 @@
 """
 Main orchestration script for Reel Data Extraction
 """
+import atexit
+import functools
+import logging
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Callable, Optional
 from src.services.video_downloader import VideoDownloader
 from src.services.video_segmenter import VideoSegmenter
 from src.services.gemini_analyzer import GeminiAnalyzer
@@ -12,13 +18,44 @@ from src.utils.config import Config
 from src.utils.file_utils import cleanup_temp_file
 
 
+# Pipeline progress is logged through a queue: worker threads only enqueue
+# records and a single background listener writes them to the console, so
+# stdout/stderr I/O never sits on the extraction's critical path.
+logger = logging.getLogger("reel_extractor")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+logger.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# Per-category segmentation settings, used when the category is known up
+# front. Profiles only ever skip work the caller asked for, never add it:
+# product reels are visual (no transcript), music reels need audio but few frames.
+_CATEGORY_PROFILES = {
+    "workout": dict(keyframes=12, audio=True, transcribe=True),
+    "recipe": dict(keyframes=10, audio=True, transcribe=True),
+    "travel": dict(keyframes=10, audio=True, transcribe=True),
+    "product": dict(keyframes=12, audio=False, transcribe=False),
+    "educational": dict(keyframes=8, audio=True, transcribe=True),
+    "music": dict(keyframes=2, audio=True, transcribe=True),
+}
+
 class ReelExtractor:
     """
     Main orchestrator for the reel extraction pipeline.
     
     Coordinates all services to extract structured data from video reels.
+    The pipeline is split into four stages (download, segment, analyze,
+    store) that `extract` runs in order.
     """
     
+    # Max progress updates waiting for the callback thread; extras are dropped.
+    NOTIFY_QUEUE_SIZE = 64
+    # Seconds `extract` waits for its queued progress updates to be delivered.
+    NOTIFY_FLUSH_TIMEOUT = 5.0
+    
     def __init__(self):
         """Initialize all services"""
         Config.validate()
@@ -28,6 +65,254 @@ class ReelExtractor:
         self.segmenter = VideoSegmenter()
         self.analyzer = GeminiAnalyzer()
         self.storage = SupermemeoryClient()
+        
+        # Progress callbacks run on a daemon thread so a slow callback never
+        # blocks the pipeline itself.
+        self._notify_q: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue(
+            maxsize=self.NOTIFY_QUEUE_SIZE
+        )
+        self._notify_thread = threading.Thread(
+            target=self._drain_notifications, name="reel-notify", daemon=True
+        )
+        self._notify_thread.start()
+    
+    def close(self) -> None:
+        """
+        Stop the callback thread and release pooled connections.
+        
+        Never blocks for longer than NOTIFY_FLUSH_TIMEOUT: it runs from a
+        shutdown hook on the event loop, and the daemon callback thread is
+        simply abandoned if it is stuck.
+        """
+        try:
+            self._notify_q.put(None, timeout=self.NOTIFY_FLUSH_TIMEOUT)
+        except queue.Full:
+            logger.warning("⚠️  Progress callback queue still full at shutdown")
+        else:
+            self._notify_thread.join(self.NOTIFY_FLUSH_TIMEOUT)
+        self.storage.close()
+    
+    def _drain_notifications(self) -> None:
+        """Callback thread: run queued progress updates until `close()`."""
+        while True:
+            job = self._notify_q.get()
+            if job is None:
+                return
+            try:
+                job()
+            except Exception:
+                logger.warning("⚠️  Progress callback failed", exc_info=True)
+    
+    def _flush_notifications(self) -> None:
+        """Wait until progress updates queued so far have been delivered."""
+        delivered = threading.Event()
+        try:
+            self._notify_q.put(delivered.set, timeout=self.NOTIFY_FLUSH_TIMEOUT)
+        except queue.Full:
+            return
+        delivered.wait(self.NOTIFY_FLUSH_TIMEOUT)
+    
+    @staticmethod
+    def _new_result() -> dict:
+        """Empty result record shared by all stages of one extraction."""
+        return {
+            "success": False,
+            "extraction": None,
+            "stored": False,
+            "errors": [],
+            "temp_files": [],
+            "thumbnail_path": None,
+        }
+    
+    def _make_notifier(
+        self,
+        progress_callback: Optional[Callable[[str, int], None]],
+    ) -> Callable[[str, int], None]:
+        """
+        Wrap an optional progress callback so it can never break the pipeline.
+        
+        Updates are handed to the callback thread without waiting; if it has
+        fallen behind, the update is dropped (a later one supersedes it).
+        """
+        def notify(stage: str, progress: int) -> None:
+            """Notify external callers (e.g., API) about stage/progress."""
+            if progress_callback is None:
+                return
+            try:
+                self._notify_q.put_nowait(functools.partial(progress_callback, stage, progress))
+            except queue.Full:
+                pass
+        return notify
+    
+    def _download_stage(
+        self,
+        result: dict,
+        input_source: str,
+        source_type: str,
+        notify: Callable[[str, int], None],
+    ) -> Optional[Path]:
+        """Step 1: download or copy the video. Returns None on failure."""
+        notify("downloading", 10)
+        logger.info("📥 Step 1: Processing video...")
+        video_path, error = self.downloader.process(
+            input_source, source_type, temp_files=result["temp_files"]
+        )
+        if error:
+            result["errors"].append(f"Download error: {error}")
+            notify("error", 100)
+            return None
+        
+        result["temp_files"].append(video_path)
+        logger.info(f"✓ Video processed: {video_path}")
+        notify("downloading", 30)
+        return video_path
+    
+    def _segment_stage(
+        self,
+        result: dict,
+        video_path: Path,
+        extract_keyframes: bool,
+        extract_audio: bool,
+        transcribe: bool,
+        notify: Callable[[str, int], None],
+        preferred_category: Optional[str] = None,
+    ) -> dict:
+        """
+        Step 2: extract keyframes and (optionally) audio + transcript.
+        
+        With a known category, its profile in `_CATEGORY_PROFILES` caps the
+        keyframe count and may skip audio/transcription.
+        """
+        notify("segmenting", 40)
+        logger.info("✂️  Step 2: Segmenting video...")
+        max_keyframes = None
+        profile = _CATEGORY_PROFILES.get(preferred_category or "")
+        if profile:
+            max_keyframes = profile["keyframes"]
+            extract_audio = extract_audio and profile["audio"]
+            transcribe = transcribe and profile["transcribe"]
+        segmentation = self.segmenter.segment_video(
+            video_path,
+            extract_keyframes=extract_keyframes,
+            extract_audio=extract_audio,
+            transcribe=transcribe,
+            max_keyframes=max_keyframes
+        )
+        
+        if segmentation["errors"]:
+            result["errors"].extend(segmentation["errors"])
+        
+        # Add temp files to cleanup list
+        if segmentation["audio_path"]:
+            result["temp_files"].append(segmentation["audio_path"])
+        result["temp_files"].extend(segmentation["keyframes"])
+
+        # Keep track of the first keyframe so we can expose a thumbnail
+        # URL for downstream features like Google Lens / product search.
+        if segmentation["keyframes"]:
+            # Store as string path; API layer will convert to a URL.
+            result["thumbnail_path"] = str(segmentation["keyframes"][0])
+        
+        logger.info(f"✓ Extracted {len(segmentation['keyframes'])} keyframes")
+        if segmentation.get("transcript"):
+            logger.info(f"✓ Audio transcribed: {len(segmentation['transcript']['text'])} characters")
+        else:
+            logger.info("ℹ️  No audio transcript available (continuing without it)")
+        notify("segmenting", 60)
+        return segmentation
+    
+    def _analyze_stage(
+        self,
+        result: dict,
+        video_path: Path,
+        segmentation: dict,
+        extract_keyframes: bool,
+        preferred_category: Optional[str],
+        notify: Callable[[str, int], None],
+    ) -> bool:
+        """Step 3: run Gemini analysis. Returns False on failure."""
+        notify("analyzing", 70)
+        logger.info("🤖 Step 3: Analyzing with Gemini AI...")
+        transcript_text = None
+        if segmentation.get("transcript") and segmentation["transcript"].get("text"):
+            transcript_text = segmentation["transcript"]["text"]
+        
+        extraction, error,keyframes = self.analyzer.analyze_video(
+            video_path,
+            keyframes=segmentation["keyframes"] if extract_keyframes else None,
+            transcript=transcript_text,
+            preferred_category=preferred_category
+        )
+        if error:
+            result["errors"].append(f"Analysis error: {error}")
+            notify("error", 100)
+            return False
+        extraction.keyframes = keyframes
+        
+        result["extraction"] = extraction
+        logger.info(f"✓ Category detected: {extraction.category}")
+        logger.info(f"✓ Title: {extraction.title}")
+        notify("analyzing", 85)
+        return True
+    
+    def _store_stage(
+        self,
+        result: dict,
+        input_source: str,
+        source_type: str,
+        notify: Callable[[str, int], None],
+    ) -> None:
+        """Step 4: persist the extraction in supermemeory.ai."""
+        notify("storing", 90)
+        logger.info("💾 Step 4: Storing in supermemeory.ai...")
+        storage_result, storage_error = self.storage.store_extraction(
+            result["extraction"],
+            source_url=input_source if source_type == "url" else None
+        )
+        
+        if storage_error:
+            result["errors"].append(f"Storage error: {storage_error}")
+        else:
+            result["stored"] = True
+            logger.info("✓ Data stored successfully in supermemeory.ai")
+        
+        result["success"] = True
+        notify("done", 100)
+    
+    def _cleanup(self, result: dict, video_path: Optional[Path] = None) -> None:
+        """
+        Remove temp files created for one extraction.
+
+        Only this reel's keyframe directory is removed so that other reels
+        still moving through the pipeline keep their files.
+        """
+        import shutil
+        logger.info("🧹 Cleaning up temporary files...")
+        
+        # Clean up individual temp files (videos, audio, cookies)
+        for temp_file in result["temp_files"]:
+            if temp_file and Path(temp_file).exists():
+                try:
+                    cleanup_temp_file(Path(temp_file))
+                except Exception as e:
+                    logger.warning(f"⚠️  Could not delete {temp_file}: {e}")
+        
+        # Clean up this reel's keyframe directory (temp_storage/keyframes_<video_id>/)
+        try:
+            temp_storage = Path(__file__).parent / 'temp_storage'
+            keyframe_dir_name = f"keyframes_{video_path.stem}" if video_path else None
+            if temp_storage.exists():
+                for item in temp_storage.iterdir():
+                    try:
+                        if item.is_dir() and item.name == keyframe_dir_name:
+                            shutil.rmtree(item)
+                            logger.info(f"✓ Removed directory: {item.name}")
+                    except Exception as e:
+                        logger.warning(f"⚠️  Could not delete {item.name}: {e}")
+        except Exception as e:
+            logger.warning(f"⚠️  Could not clean up temp_storage: {e}")
+        
+        logger.info("✓ Cleanup complete")
     
     def extract(
         self,
@@ -53,109 +338,26 @@ class ReelExtractor:
         Returns:
             Dictionary with extraction results
         """
-        def notify(stage: str, progress: int) -> None:
-            """Notify external callers (e.g., API) about stage/progress."""
-            if progress_callback is None:
-                return
-            try:
-                progress_callback(stage, progress)
-            except Exception:
-                # Never let callback errors break the core pipeline
-                pass
-        result = {
-            "success": False,
-            "extraction": None,
-            "stored": False,
-            "errors": [],
-            "temp_files": [],
-            "thumbnail_path": None,
-        }
+        notify = self._make_notifier(progress_callback)
+        result = self._new_result()
+        video_path = None
         
         try:
-            # Step 1: Download/Process video
-            notify("downloading", 10)
-            print("📥 Step 1: Processing video...")
-            video_path, error = self.downloader.process(input_source, source_type)
-            if error:
-                result["errors"].append(f"Download error: {error}")
-                notify("error", 100)
+            video_path = self._download_stage(result, input_source, source_type, notify)
+            if video_path is None:
                 return result
             
-            result["temp_files"].append(video_path)
-            print(f"✓ Video processed: {video_path}")
-            notify("downloading", 30)
-            
-            # Step 2: Segment video (keyframes, audio)
-            notify("segmenting", 40)
-            print("✂️  Step 2: Segmenting video...")
-            segmentation = self.segmenter.segment_video(
-                video_path,
-                extract_keyframes=extract_keyframes,
-                extract_audio=extract_audio,
-                transcribe=transcribe
+            segmentation = self._segment_stage(
+                result, video_path, extract_keyframes, extract_audio, transcribe, notify,
+                preferred_category,
             )
             
-            if segmentation["errors"]:
-                result["errors"].extend(segmentation["errors"])
-            
-            # Add temp files to cleanup list
-            if segmentation["audio_path"]:
-                result["temp_files"].append(segmentation["audio_path"])
-            result["temp_files"].extend(segmentation["keyframes"])
-
-            # Keep track of the first keyframe so we can expose a thumbnail
-            # URL for downstream features like Google Lens / product search.
-            if segmentation["keyframes"]:
-                # Store as string path; API layer will convert to a URL.
-                result["thumbnail_path"] = str(segmentation["keyframes"][0])
-            
-            print(f"✓ Extracted {len(segmentation['keyframes'])} keyframes")
-            if segmentation.get("transcript"):
-                print(f"✓ Audio transcribed: {len(segmentation['transcript']['text'])} characters")
-            else:
-                print("ℹ️  No audio transcript available (continuing without it)")
-            notify("segmenting", 60)
-            
-            # Step 3: Analyze with Gemini
-            notify("analyzing", 70)
-            print("🤖 Step 3: Analyzing with Gemini AI...")
-            transcript_text = None
-            if segmentation.get("transcript") and segmentation["transcript"].get("text"):
-                transcript_text = segmentation["transcript"]["text"]
-            
-            extraction, error,keyframes = self.analyzer.analyze_video(
-                video_path,
-                keyframes=segmentation["keyframes"] if extract_keyframes else None,
-                transcript=transcript_text,
-                preferred_category=preferred_category
-            )
-            extraction.keyframes = keyframes
-            if error:
-                result["errors"].append(f"Analysis error: {error}")
-                notify("error", 100)
+            if not self._analyze_stage(
+                result, video_path, segmentation, extract_keyframes, preferred_category, notify
+            ):
                 return result
             
-            result["extraction"] = extraction
-            print(f"✓ Category detected: {extraction.category}")
-            print(f"✓ Title: {extraction.title}")
-            notify("analyzing", 85)
-            
-            # Step 4: Store in supermemeory.ai
-            notify("storing", 90)
-            print("💾 Step 4: Storing in supermemeory.ai...")
-            storage_result, storage_error = self.storage.store_extraction(
-                extraction,
-                source_url=input_source if source_type == "url" else None
-            )
-            
-            if storage_error:
-                result["errors"].append(f"Storage error: {storage_error}")
-            else:
-                result["stored"] = True
-                print("✓ Data stored successfully in supermemeory.ai")
-            
-            result["success"] = True
-            notify("done", 100)
+            self._store_stage(result, input_source, source_type, notify)
             return result
             
         except Exception as e:
@@ -165,38 +367,24 @@ class ReelExtractor:
         
         finally:
             # Always cleanup temp files (success or failure) to prevent disk space waste
-            import shutil
-            print("🧹 Cleaning up temporary files...")
-            
-            # Clean up individual temp files (videos, audio, cookies)
-            for temp_file in result["temp_files"]:
-                if temp_file and Path(temp_file).exists():
-                    try:
-                        cleanup_temp_file(Path(temp_file))
-                    except Exception as e:
-                        print(f"⚠️  Could not delete {temp_file}: {e}")
-            
-            # Clean up keyframe directories (e.g., temp_storage/keyframes_<video_id>/)
-            # and any temporary cookie files
-            try:
-                temp_storage = Path(__file__).parent / 'temp_storage'
-                if temp_storage.exists():
-                    for item in temp_storage.iterdir():
-                        try:
-                            # Remove keyframe directories
-                            if item.is_dir() and item.name.startswith('keyframes_'):
-                                shutil.rmtree(item)
-                                print(f"✓ Removed directory: {item.name}")
-                            # Remove temp cookie files (from Render Secret Files copy)
-                            elif item.is_file() and 'instagram_cookies' in item.name:
-                                item.unlink()
-                                print(f"✓ Removed temp cookies: {item.name}")
-                        except Exception as e:
-                            print(f"⚠️  Could not delete {item.name}: {e}")
-            except Exception as e:
-                print(f"⚠️  Could not clean up temp_storage: {e}")
-            
-            print("✓ Cleanup complete")
+            self._cleanup(result, video_path)
+            if progress_callback is not None:
+                # Callers update their own status after we return; make sure
+                # no stale progress update lands on top of it.
+                self._flush_notifications()
+
+
+@functools.lru_cache(maxsize=1)
+def get_extractor() -> ReelExtractor:
+    """
+    Process-wide ReelExtractor shared by the API routes.
+
+    Building one validates config and initializes every service (Gemini
+    model probe, Supermemory client, ffmpeg check), so it is done once
+    and reused for every submitted reel. The services keep no per-reel
+    state, so all extraction workers share this one instance.
+    """
+    return ReelExtractor()
 
 
 def main():
@@ -8,41 +8,145 @@ short enhanced summary and suggested actions. The UI can surface this
 as an "Enhance with AI" experience.
 """
 
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import functools
+import hashlib
 import json
+import logging
 import re
-import os
+import time
 
-import requests
-from dotenv import load_dotenv
+import httpx
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from datetime import datetime
-
-from src.api.reels import REELS
+from datetime import datetime, timezone
+
+from src.api.reels import REELS, REELS_VIEW
+from src.api.supermemory_http import (
+    _fetch_keyframe_docs,
+    _get_sm_client,
+    _search_keyframe_results,
+    _sm_get_document,
+)
 from src.services.reel_intelligence_agent import generate_reel_intelligence
 from src.services.gemini_model_helper import _get_gemini_model
+from src.utils import json_utils
 from src.utils.config import Config
 
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
 
+logger = logging.getLogger("reel_extractor.api")
+
+# Document contents above this size are JSON-decoded in a worker thread.
+LARGE_CONTENT_BYTES = 256 * 1024
+
+# Supermemory document fetches in progress, so concurrent cache misses for
+# the same document_id share one fetch.
+_INFLIGHT_FETCHES: Dict[str, asyncio.Future] = {}
+
+# Gemini plans keyed on (endpoint, document_id, extraction hash). An
+# unchanged extraction gets the same plan back without another Gemini call;
+# generation is deterministic (temperature 0), so entries can live a day.
+PLAN_CACHE_MAX_ENTRIES = 1024
+PLAN_CACHE_TTL_SECONDS = 24 * 3600
+_PLAN_CACHE: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Concurrent /plan requests of the same category arriving within this window
+# share one Gemini call (see `_PlanBatcher`).
+PLAN_BATCH_WINDOW_SECONDS = 0.05
+PLAN_BATCH_MAX_SIZE = 8
+
+
+# Content digests of recently seen extraction dicts, keyed by id() and kept
+# with the dict itself so a recycled id can never match a different record.
+_EXTRACTION_DIGESTS: "OrderedDict[int, Tuple[Dict[str, Any], str]]" = OrderedDict()
+
+
+def _extraction_digest(extraction: Dict[str, Any]) -> str:
+    """
+    Digest of an extraction's content, computed once per stored record.
+
+    Stored reels are replaced rather than mutated, so the same dict always
+    has the same digest; this keeps the sorted dump of large extractions
+    (keyframes included) off the event loop on repeat plan requests.
+    """
+    cached = _EXTRACTION_DIGESTS.get(id(extraction))
+    if cached is not None and cached[0] is extraction:
+        _EXTRACTION_DIGESTS.move_to_end(id(extraction))
+        return cached[1]
+    digest = hashlib.blake2b(
+        json_utils.dumps_bytes(extraction, sort_keys=True),
+        digest_size=16,
+    ).hexdigest()
+    _EXTRACTION_DIGESTS[id(extraction)] = (extraction, digest)
+    while len(_EXTRACTION_DIGESTS) > PLAN_CACHE_MAX_ENTRIES:
+        _EXTRACTION_DIGESTS.popitem(last=False)
+    return digest
+
+
+def _plan_cache_key(kind: str, document_id: str, extraction: Dict[str, Any]) -> str:
+    return f"{kind}:{document_id}:{_extraction_digest(extraction)}"
+
+
+def _plan_cache_get(key: str) -> Optional[Dict[str, Any]]:
+    """Return a cached plan dict, or None if missing or expired."""
+    entry = _PLAN_CACHE.get(key)
+    if entry is None:
+        return None
+    stored_at, plan = entry
+    if time.monotonic() - stored_at > PLAN_CACHE_TTL_SECONDS:
+        _PLAN_CACHE.pop(key, None)
+        return None
+    _PLAN_CACHE.move_to_end(key)
+    return plan
+
+
+def _plan_cache_put(key: str, plan: Any) -> None:
+    """Cache a plan model (stored as its dict dump) or an already-plain dict."""
+    value = plan.model_dump() if isinstance(plan, BaseModel) else plan
+    _PLAN_CACHE[key] = (time.monotonic(), value)
+    _PLAN_CACHE.move_to_end(key)
+    while len(_PLAN_CACHE) > PLAN_CACHE_MAX_ENTRIES:
+        _PLAN_CACHE.popitem(last=False)
+
 
 async def _ensure_document_cached(document_id: str) -> Dict[str, Any]:
     """
     Ensure a document is in the REELS cache. If not found, fetch from Supermemory.
     
+    Concurrent misses for the same document share a single fetch, run as its
+    own task so no single caller's cancellation (e.g. a client disconnect)
+    cancels it for the others.
+    
     Returns the cached reel data.
     Raises HTTPException if document cannot be found or fetched.
     """
     # Check if already cached
-    reel = REELS.get(document_id)
+    reel = REELS_VIEW.get(document_id)
     if reel:
         return reel
     
-    # Not in cache - try to fetch from Supermemory
-    load_dotenv()
-    api_key = os.environ.get("SUPERMEMORY_API_KEY")
+    task = _INFLIGHT_FETCHES.get(document_id)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_document(document_id))
+        _INFLIGHT_FETCHES[document_id] = task
+
+        def forget(done: "asyncio.Future[Dict[str, Any]]") -> None:
+            if _INFLIGHT_FETCHES.get(document_id) is done:
+                del _INFLIGHT_FETCHES[document_id]
+
+        task.add_done_callback(forget)
+    # Shielded so one cancelled waiter does not cancel the shared fetch.
+    return await asyncio.shield(task)
+
+
+async def _fetch_document(document_id: str) -> Dict[str, Any]:
+    """Fetch a document + keyframes from Supermemory and store it in REELS."""
+    api_key = Config.SUPERMEMEORY_API_KEY
     
     if not api_key:
         raise HTTPException(
@@ -51,91 +155,44 @@ async def _ensure_document_cached(document_id: str) -> Dict[str, Any]:
         )
     
     # Fetch main document
-    document_url = f"https://api.supermemory.ai/v3/documents/{document_id}"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    client = _get_sm_client(api_key)
     
     try:
-        resp = requests.get(document_url, headers=headers, timeout=30)
-        resp.raise_for_status()
-        main_doc = resp.json()
-    except requests.RequestException as e:
+        main_doc, _ = await _sm_get_document(client, document_id)
+    except (httpx.HTTPError, ValueError) as e:
         raise HTTPException(
             status_code=404, 
             detail=f"Document {document_id} not found in cache or Supermemory: {str(e)}"
         )
     
     # Extract customId from main document metadata
-    metadata = main_doc.get("metadata", {})
+    metadata = main_doc.get("metadata") or {}
     custom_id = metadata.get("customId")
     
     keyframe_images = []
-    # Search for all images with matching customId
+    # Search for all images with matching customId; hits without a URL are
+    # fetched as documents concurrently (search order is kept)
     if custom_id:
-        search_url = "https://api.supermemory.ai/v3/search"
-        search_payload = {
-            "q": "images",
-            "chunkThreshold": 0.5,
-            "filters": {
-                "AND": [
-                    {
-                        "key": "customId",
-                        "value": custom_id,
-                        "negate": False
-                    }
-                ]
-            }
-        }
-        
         try:
-            search_resp = requests.post(search_url, json=search_payload, headers=headers, timeout=30)
-            search_resp.raise_for_status()
-            search_results = search_resp.json()
-            
-            # Filter only image type results and fetch full document details
-            for item in search_results.get("results", []):
-                if item.get("type") == "image":
-                    keyframe_doc_id = item.get("documentId")
-                    
-                    if keyframe_doc_id:
-                        try:
-                            keyframe_doc_url = f"https://api.supermemory.ai/v3/documents/{keyframe_doc_id}"
-                            keyframe_resp = requests.get(keyframe_doc_url, headers=headers, timeout=30)
-                            keyframe_resp.raise_for_status()
-                            keyframe_doc = keyframe_resp.json()
-                            
-                            image_url = keyframe_doc.get("url", "")
-                            summary = keyframe_doc.get("summary", "")
-                            
-                            keyframe_obj = {
-                                "documentId": keyframe_doc_id,
-                                "url": image_url,
-                                "type": "image",
-                                "metadata": keyframe_doc.get("metadata", {}),
-                                "title": keyframe_doc.get("title", ""),
-                                "summary": summary,
-                                "timestamp": keyframe_doc.get("metadata", {}).get("extracted_at", ""),
-                                "frame_number": keyframe_doc.get("metadata", {}).get("frame_index", "")
-                            }
-                            
-                            keyframe_images.append(keyframe_obj)
-                            
-                        except requests.RequestException:
-                            continue
-                            
-        except requests.RequestException:
+            keyframe_results = await _search_keyframe_results(client, custom_id)
+            keyframe_images = await _fetch_keyframe_docs(client, keyframe_results)
+        except (httpx.HTTPError, ValueError):
             pass  # Continue without keyframes
     
-    # Parse content JSON to extract structured data
+    # Parse content JSON to extract structured data. Every consumer of
+    # raw_data needs the full content, so it is decoded eagerly (orjson when
+    # available); very large payloads are decoded off the event loop.
     content_data = {}
     try:
         content_str = main_doc.get("content", "{}")
-        if content_str:
-            content_data = json.loads(content_str)
+        if content_str and len(content_str) > LARGE_CONTENT_BYTES:
+            content_data = await asyncio.to_thread(json_utils.loads, content_str)
+        elif content_str:
+            content_data = json_utils.loads(content_str)
     except (json.JSONDecodeError, Exception):
         pass
+    if not isinstance(content_data, dict):
+        content_data = {}
     
     # Build extraction object similar to regular reel format
     extraction = {
@@ -153,7 +210,7 @@ async def _ensure_document_cached(document_id: str) -> Dict[str, Any]:
     }
     
     # Store in REELS dictionary with document_id as key
-    REELS[document_id] = {
+    reel = {
         "reel_id": document_id,
         "document_id": document_id,
         "category": extraction["category"],
@@ -161,14 +218,15 @@ async def _ensure_document_cached(document_id: str) -> Dict[str, Any]:
         "model_name": "GenericExtraction",
         "extraction": extraction,
         "formatted_summary": None,
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
         "source_url": extraction["source_url"],
         "thumbnail_url": keyframe_images[0]["url"] if keyframe_images else metadata.get("thumbnail_url"),
         "errors": [],
         "_from_supermemory": True
     }
+    REELS[document_id] = reel
     
-    return REELS[document_id]
+    return reel
 
 
 class ProductAction(BaseModel):
@@ -209,71 +267,138 @@ class ReconstructionPlan(BaseModel):
     rich_text: str
 
 
+# Structured-output schemas: Gemini returns bare JSON in these shapes, so
+# responses are parsed with a single JSON decode.
+PLAN_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "OBJECT",
+    "properties": {
+        "heading": {"type": "STRING", "description": "catchy, 3-8 words, no emojis"},
+        "subtitle": {"type": "STRING", "description": "1 short sentence: what matters most"},
+        "bullets": {
+            "type": "ARRAY",
+            "items": {"type": "STRING"},
+            "description": "3-6 points, each <= 18 words",
+        },
+        "suggested_actions": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "label": {"type": "STRING", "description": "button label, <= 32 chars"},
+                    "description": {"type": "STRING", "description": "what the action helps do"},
+                },
+                "required": ["label"],
+            },
+        },
+    },
+    "required": ["heading", "bullets", "suggested_actions"],
+}
+
+RECONSTRUCT_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "type": "OBJECT",
+    "properties": {
+        "heading": {"type": "STRING", "nullable": True, "description": "improved heading or null"},
+        "subtitle": {"type": "STRING", "nullable": True, "description": "improved one-line summary or null"},
+        "rich_text": {
+            "type": "STRING",
+            "description": "one multi-paragraph block; simple Markdown lists allowed",
+        },
+    },
+    "required": ["rich_text"],
+}
+
+
+def _json_generation_config(schema: Dict[str, Any]) -> Dict[str, Any]:
+    # temperature 0 keeps output deterministic for a given prompt, which is
+    # what makes caching plans by extraction hash sound.
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+        "temperature": 0.0,
+    }
+
+
+# Built once: the model helper reuses models per config, and stable config
+# objects keep that lookup cheap.
+PLAN_GENERATION_CONFIG = _json_generation_config(PLAN_RESPONSE_SCHEMA)
+PLAN_BATCH_GENERATION_CONFIG = _json_generation_config({"type": "ARRAY", "items": PLAN_RESPONSE_SCHEMA})
+RECONSTRUCT_GENERATION_CONFIG = _json_generation_config(RECONSTRUCT_RESPONSE_SCHEMA)
+
+
+# Prompt payload budget: lists and long strings (e.g. additional_context,
+# transcripts) are trimmed, tighter each pass, until the JSON fits.
+PROMPT_JSON_MAX_CHARS = 8000
+_PROMPT_PRUNE_STEPS = ((20, 4000), (10, 2000), (5, 1000), (3, 400))
+
+
+def _prune_for_prompt(value: Any, max_items: int, max_text: int) -> Any:
+    if isinstance(value, dict):
+        return {k: _prune_for_prompt(v, max_items, max_text) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_prune_for_prompt(v, max_items, max_text) for v in value[:max_items]]
+    if isinstance(value, str) and len(value) > max_text:
+        return value[:max_text] + "…"
+    return value
+
+
+def _prompt_json(obj: Any, max_chars: int = PROMPT_JSON_MAX_CHARS) -> str:
+    """Compact JSON for a prompt, pruned to roughly `max_chars`."""
+    text = json_utils.dumps(obj)
+    if len(text) <= max_chars:
+        return text
+    original = len(text)
+    for max_items, max_text in _PROMPT_PRUNE_STEPS:
+        text = json_utils.dumps(_prune_for_prompt(obj, max_items, max_text))
+        if len(text) <= max_chars:
+            break
+    logger.debug("Trimmed prompt JSON from %d to %d chars", original, len(text))
+    return text
+
+
+# Per-category focus lines appended to the system prompt.
+_CATEGORY_FOCI: Dict[str, str] = {
+    "product": (
+        "Products/shopping. Focus:\n"
+        "- offers: prices, promos, bundles\n"
+        "- actions: visit store, shopping list, visual search, compare prices\n"
+    ),
+    "recipe": (
+        "Recipe. Focus:\n"
+        "- dish type, key ingredients, meal slot (snack, dinner, dessert)\n"
+        "- actions: shopping list, guided cook mode, dietary adaptations\n"
+    ),
+    "workout": (
+        "Workout. Focus:\n"
+        "- type, difficulty, muscle groups, format (rounds, sets, intervals)\n"
+        "- actions: guided timer, copy plan, adjust duration/sets\n"
+    ),
+    "travel": (
+        "Travel/itinerary. Focus:\n"
+        "- destinations, day ranges, key activities\n"
+        "- actions: copy itinerary, open maps, estimate days/budget\n"
+    ),
+}
+_GENERIC_FOCUS = (
+    "Generic. Focus: main topic, concrete items or steps; "
+    "actions that help the user use or remember it.\n"
+)
+
+
+@functools.lru_cache(maxsize=16)
 def _build_system_prompt(category: str) -> str:
     """Return a category-aware system prompt."""
     base = (
-        "You are an assistant that reads structured JSON extracted from a short social video.\n"
-        "Your job is to summarize what is most useful for the user and propose a few high-impact "
-        "actions they can take, WITHOUT hallucinating extra items or prices.\n"
-        "The UI will show your output as a small hero section and a list of actions.\n"
+        "Read JSON extracted from a short social video. Summarize what is most useful "
+        "to the user and propose a few high-impact actions. Never invent items or prices.\n"
+        "Output feeds a small hero section plus an action list.\n"
     )
-
-    cat = (category or "").lower()
-    if cat == "product":
-        extra = (
-            "The content is about products or shopping. Focus on:\n"
-            "- what is on offer (price ranges, promos, bundles),\n"
-            "- how to act on it (visit store, capture shopping list, search visually, compare prices).\n"
-        )
-    elif cat == "recipe":
-        extra = (
-            "The content is a recipe. Focus on:\n"
-            "- what kind of dish and key ingredients,\n"
-            "- how it fits into a meal (snack, dinner, dessert),\n"
-            "- useful actions like: generate shopping list, start guided cook mode, adapt to dietary needs.\n"
-        )
-    elif cat == "workout":
-        extra = (
-            "The content is a workout. Focus on:\n"
-            "- workout type and difficulty,\n"
-            "- major muscle groups and format (rounds, sets, intervals),\n"
-            "- actions like: start guided timer, copy workout plan, adjust duration or sets.\n"
-        )
-    elif cat == "travel":
-        extra = (
-            "The content is travel/itinerary. Focus on:\n"
-            "- destinations and day ranges,\n"
-            "- highlight key activities and experiences,\n"
-            "- actions like: copy itinerary, open maps links, estimate days or budget.\n"
-        )
-    else:
-        extra = (
-            "The content is generic. Focus on the main topic and any concrete items or steps, "
-            "then suggest actions that help the user use or remember this information.\n"
-        )
-
-    return base + extra
+    return base + _CATEGORY_FOCI.get((category or "").lower(), _GENERIC_FOCUS)
 
 
 def _build_user_prompt(extraction: Dict[str, Any], raw_data: Dict[str, Any]) -> str:
     return (
-        "Here is the structured extraction JSON for this reel:\n"
-        f"{extraction}\n\n"
-        "Here is the raw_data JSON (may contain additional context or items):\n"
-        f"{raw_data}\n\n"
-        "IMPORTANT: Respond with ONLY valid JSON. Ensure all strings are properly escaped.\n"
-        "Use \\n for line breaks within strings, and escape any quotes with \\\".\n"
-        "\n"
-        "Respond strictly as compact JSON with the following shape:\n"
-        "{\n"
-        '  "heading": "short catchy heading, 3-8 words, no emojis",\n'
-        '  "subtitle": "1 short sentence summarizing what matters most for the user",\n'
-        '  "bullets": ["3-6 bullet points, each <= 18 words"],\n'
-        '  "suggested_actions": [\n'
-        '    {"label": "Button label, <= 32 chars", "description": "What this action helps the user do."}\n'
-        "  ]\n"
-        "}\n"
-        "Do not add any extra keys, comments, trailing commas, or explanations outside this JSON object."
+        f"extraction:\n{_prompt_json(extraction)}\n\n"
+        f"raw_data (extra context/items):\n{_prompt_json(raw_data)}"
     )
 
 
@@ -284,34 +409,15 @@ def _build_reconstruct_prompt(extraction: Dict[str, Any], raw_data: Dict[str, An
     """
 
     return (
-        "You are given structured JSON extracted from a short social video.\n"
-        "The main schema fields (ingredients, products, steps, etc.) have already been used for the UI.\n"
-        "Now we only care about the *leftover context* — especially the `additional_context`\n"
-        "and any other descriptive fields that did not fit the main schema.\n"
-        "\n"
-        "Your job is to create ONE rich, human-friendly section that:\n"
-        "- Summarizes the most useful insights from this leftover/generic data.\n"
-        "- Groups related ideas into short paragraphs or bullet lists.\n"
-        "- Preserves any concrete facts (times, brands, locations) without hallucinating new ones.\n"
-        "- Reads like a compact, well-organized explainer for the user.\n"
-        "\n"
-        "Do NOT try to rebuild all structured fields. Focus on meaningful narrative from the\n"
-        "additional_context and any descriptive text fields.\n"
-        "\n"
-        "Here is the current extraction JSON (for light context):\n"
-        f"{extraction}\n\n"
-        "Here is the current raw_data JSON (including additional_context):\n"
-        f"{raw_data}\n\n"
-        "IMPORTANT: Respond with ONLY valid JSON. Ensure all strings are properly escaped.\n"
-        "Use \\n for line breaks within strings, and escape any quotes with \\\".\n"
-        "\n"
-        "Respond strictly as compact JSON with the following shape:\n"
-        "{\n"
-        '  "heading": "optional improved heading, or null",\n'
-        '  "subtitle": "optional improved one-line summary, or null",\n'
-        '  "rich_text": "a single rich, multi-paragraph block of text. Use \\n for line breaks. You MAY use simple Markdown like bullet lists but ensure all text is properly escaped for JSON."\n'
-        "}\n"
-        "Do not add any extra keys, comments, trailing commas, or explanations outside this JSON object.\n"
+        "The main schema fields (ingredients, products, steps, ...) are already shown in the UI. "
+        "Use only the leftover context, mainly `additional_context` and other descriptive fields, "
+        "to write ONE readable section:\n"
+        "- summarize the most useful insights\n"
+        "- group related ideas into short paragraphs or bullets\n"
+        "- keep concrete facts (times, brands, locations); invent none\n"
+        "Do not rebuild the structured fields.\n\n"
+        f"extraction (light context):\n{_prompt_json(extraction)}\n\n"
+        f"raw_data:\n{_prompt_json(raw_data)}"
     )
 
 
@@ -325,17 +431,27 @@ def _call_gemini_for_plan(
     system_prompt = _build_system_prompt(category)
     user_prompt = _build_user_prompt(extraction, raw_data)
 
+    generation_config = PLAN_GENERATION_CONFIG
+
     # First try with Pro preference; if we hit a quota error, fall back to
     # flash-only models in the same request.
     try:
-        model = _get_gemini_model(allow_pro=True)
-        resp = model.generate_content([system_prompt, user_prompt])
+        model = _get_gemini_model(
+            allow_pro=True,
+            generation_config=generation_config,
+            system_instruction=system_prompt,
+        )
+        resp = model.generate_content(user_prompt)
     except Exception as exc:  # pragma: no cover - depends on remote API
         msg = str(exc)
         if "ResourceExhausted" in msg or "quota" in msg or "429" in msg:
             # Quota limits on Pro: gracefully fall back to flash models
-            model = _get_gemini_model(allow_pro=False)
-            resp = model.generate_content([system_prompt, user_prompt])
+            model = _get_gemini_model(
+                allow_pro=False,
+                generation_config=generation_config,
+                system_instruction=system_prompt,
+            )
+            resp = model.generate_content(user_prompt)
         else:
             raise HTTPException(
                 status_code=502,
@@ -344,31 +460,21 @@ def _call_gemini_for_plan(
 
     text = resp.text or ""
 
-    # Try to extract JSON from code blocks first (```json ... ```)
-    json_block_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
-    if json_block_match:
-        json_str = json_block_match.group(1)
-    else:
-        # Fall back to finding raw JSON object
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not match:
-            raise HTTPException(
-                status_code=502,
-                detail="Gemini did not return a JSON object for the enhancement plan.",
-            )
-        json_str = match.group(0)
-
     try:
-        data = json.loads(json_str)
+        data = json_utils.loads(text)
     except json.JSONDecodeError as exc:
         # Log the problematic JSON for debugging
         print(f"Failed to parse enhancement JSON from Gemini. Raw response:\n{text}")
-        print(f"Extracted JSON string:\n{json_str}")
         raise HTTPException(
             status_code=502,
             detail=f"Failed to parse enhancement JSON from Gemini: {exc}",
         ) from exc
 
+    return _plan_from_data(data)
+
+
+def _plan_from_data(data: Dict[str, Any]) -> ProductEnhancementPlan:
+    """Build a ProductEnhancementPlan from Gemini's parsed JSON object."""
     heading = data.get("heading") or "Highlights"
     subtitle = data.get("subtitle")
     bullets = data.get("bullets") or []
@@ -396,14 +502,207 @@ def _call_gemini_for_plan(
     )
 
 
+def _build_batch_user_prompt(items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> str:
+    """Prompt asking for one enhancement plan per reel, as a JSON array in order."""
+    reels = "".join(
+        f"### Reel {idx}\n"
+        f"extraction:\n{_prompt_json(extraction)}\n"
+        f"raw_data:\n{_prompt_json(raw_data)}\n\n"
+        for idx, (extraction, raw_data) in enumerate(items, start=1)
+    )
+    return (
+        f"{len(items)} reels follow. Return a JSON array of exactly {len(items)} plans, "
+        "one per reel, in order.\n\n"
+        f"{reels}"
+    )
+
+
+def _call_gemini_for_plan_batch(
+    category: str,
+    items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+) -> List[ProductEnhancementPlan]:
+    """
+    One Gemini call producing enhancement plans for several reels of the same category.
+
+    Raises on any error or malformed response so the caller can fall back
+    to per-reel calls.
+    """
+    system_prompt = _build_system_prompt(category)
+    user_prompt = _build_batch_user_prompt(items)
+    generation_config = PLAN_BATCH_GENERATION_CONFIG
+
+    try:
+        model = _get_gemini_model(
+            allow_pro=True,
+            generation_config=generation_config,
+            system_instruction=system_prompt,
+        )
+        resp = model.generate_content(user_prompt)
+    except Exception as exc:  # pragma: no cover - depends on remote API
+        msg = str(exc)
+        if not ("ResourceExhausted" in msg or "quota" in msg or "429" in msg):
+            raise
+        model = _get_gemini_model(
+            allow_pro=False,
+            generation_config=generation_config,
+            system_instruction=system_prompt,
+        )
+        resp = model.generate_content(user_prompt)
+
+    data = json_utils.loads(resp.text or "")
+    if not isinstance(data, list) or len(data) != len(items):
+        raise ValueError(f"expected a JSON array of {len(items)} plans")
+
+    return [_plan_from_data(entry if isinstance(entry, dict) else {}) for entry in data]
+
+
+class _PlanBatcher:
+    """
+    Micro-batches concurrent enhancement-plan requests for one category.
+
+    The first request opens a short window (PLAN_BATCH_WINDOW_SECONDS);
+    everything arriving before it closes, up to PLAN_BATCH_MAX_SIZE, is
+    answered by a single Gemini call. If the batched call fails, each
+    request falls back to its own call.
+    """
+
+    def __init__(self, category: str):
+        self.category = category
+        self._pending: List[Tuple[Dict[str, Any], Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set = set()
+
+    async def submit(self, extraction: Dict[str, Any], raw_data: Dict[str, Any]) -> ProductEnhancementPlan:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((extraction, raw_data, future))
+        if len(self._pending) >= PLAN_BATCH_MAX_SIZE:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(PLAN_BATCH_WINDOW_SECONDS, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], Dict[str, Any], asyncio.Future]]) -> None:
+        if len(batch) > 1:
+            try:
+                plans = await asyncio.to_thread(
+                    _call_gemini_for_plan_batch,
+                    self.category,
+                    [(extraction, raw_data) for extraction, raw_data, _ in batch],
+                )
+            except Exception as exc:
+                logger.warning(
+                    "Batched plan request failed (%s); retrying %d reels individually", exc, len(batch)
+                )
+            else:
+                for (_, _, future), plan in zip(batch, plans):
+                    if not future.done():
+                        future.set_result(plan)
+                return
+
+        async def single(extraction: Dict[str, Any], raw_data: Dict[str, Any], future: asyncio.Future) -> None:
+            try:
+                plan = await asyncio.to_thread(_call_gemini_for_plan, extraction, raw_data)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(plan)
+
+        await asyncio.gather(*(single(*item) for item in batch))
+
+
+_PLAN_BATCHERS: Dict[str, _PlanBatcher] = {}
+
+
+def _get_plan_batcher(category: str) -> _PlanBatcher:
+    batcher = _PLAN_BATCHERS.get(category)
+    if batcher is None:
+        batcher = _PLAN_BATCHERS[category] = _PlanBatcher(category)
+    return batcher
+
+
+# raw_data keys added by `_ensure_document_cached` that carry no content.
+_BOOKKEEPING_KEYS = {"_supermemory_id", "_custom_id", "_keyframes"}
+# Extraction fields that describe a reel rather than hold its content.
+_NON_CONTENT_KEYS = _BOOKKEEPING_KEYS | {
+    "title",
+    "description",
+    "category",
+    "keyframes",
+    "extracted_at",
+    "source_url",
+    "confidence_score",
+}
+
+
+def _direct_plan(extraction: Dict[str, Any]) -> Optional[ProductEnhancementPlan]:
+    """
+    Deterministic plan for low-information extractions, or None.
+
+    When there is no real content beyond a title and description (e.g. a
+    bare generic Supermemory document), a Gemini call would only echo it
+    back as a "Highlights" heading, so build that answer directly.
+    Structured extractions (recipes, workouts, ...) keep their content at
+    the top level, so it is measured over the same `raw_data` fallback the
+    planners use.
+    """
+    raw_data = extraction.get("raw_data") or extraction
+    title = extraction.get("title") or ""
+    description = extraction.get("description") or ""
+    has_content = any(
+        key not in _NON_CONTENT_KEYS and value not in (None, "", [], {})
+        for key, value in raw_data.items()
+    )
+    if has_content:
+        return None
+
+    return ProductEnhancementPlan(
+        heading=title or "Highlights",
+        subtitle=description or None,
+        bullets=[],
+        suggested_actions=[],
+    )
+
+
+async def _cached_plan(document_id: str, extraction: Dict[str, Any], refresh: bool) -> ProductEnhancementPlan:
+    """Enhancement plan from the cache, or from (batched) Gemini on a miss / refresh."""
+    direct = _direct_plan(extraction)
+    if direct is not None:
+        return direct
+
+    key = _plan_cache_key("plan", document_id, extraction)
+    cached = None if refresh else _plan_cache_get(key)
+    if cached is not None:
+        return ProductEnhancementPlan(**cached)
+
+    raw_data = extraction.get("raw_data") or extraction
+    category = (extraction.get("category") or "").lower()
+    plan = await _get_plan_batcher(category).submit(extraction, raw_data)
+    _plan_cache_put(key, plan)
+    return plan
+
+
 @router.get("/product-plan/{document_id}", response_model=ProductEnhancementPlan)
-async def product_enhancement_plan(document_id: str) -> ProductEnhancementPlan:
+async def product_enhancement_plan(document_id: str, refresh: bool = False) -> ProductEnhancementPlan:
     """
     Backwards-compatible endpoint focused on product reels.
 
     Prefer using `/api/agents/plan/{document_id}` for new integrations, which
     works for all categories. This endpoint simply checks that the reel
     is a product and then delegates to the generic planner.
+    Pass `?refresh=1` to bypass the plan cache.
     """
     # Ensure document is cached (fetch from Supermemory if needed)
     reel = await _ensure_document_cached(document_id)
@@ -416,37 +715,190 @@ async def product_enhancement_plan(document_id: str) -> ProductEnhancementPlan:
             detail=f"This helper currently supports product reels only (got {category or 'unknown'}).",
         )
 
-    raw_data = extraction.get("raw_data") or extraction
-
-    return _call_gemini_for_plan(extraction, raw_data)
+    return await _cached_plan(document_id, extraction, refresh)
 
 
 @router.get("/plan/{document_id}", response_model=ProductEnhancementPlan)
-async def generic_enhancement_plan(document_id: str) -> ProductEnhancementPlan:
+async def generic_enhancement_plan(document_id: str, refresh: bool = False) -> ProductEnhancementPlan:
     """
     Category-aware enhancement plan for ANY reel.
 
     Reads the extraction + raw_data for the given document_id, uses the
     reel's category to guide the system prompt, and returns a concise
     heading, subtitle, highlights and suggested actions.
+    Pass `?refresh=1` to bypass the plan cache.
+    """
+    # Ensure document is cached (fetch from Supermemory if needed)
+    reel = await _ensure_document_cached(document_id)
+
+    extraction: Dict[str, Any] = reel.get("extraction") or {}
+    return await _cached_plan(document_id, extraction, refresh)
+
+
+def _stream_gemini_plan_text(extraction: Dict[str, Any], raw_data: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield the enhancement-plan JSON text chunk by chunk as Gemini produces it.
+
+    Same prompts and schema as `_call_gemini_for_plan`; falls back to flash
+    models on a quota error, as long as nothing was streamed yet.
+    """
+    category = (extraction.get("category") or "").lower()
+    system_prompt = _build_system_prompt(category)
+    user_prompt = _build_user_prompt(extraction, raw_data)
+    generation_config = PLAN_GENERATION_CONFIG
+
+    for allow_pro in (True, False):
+        started = False
+        try:
+            model = _get_gemini_model(
+                allow_pro=allow_pro,
+                generation_config=generation_config,
+                system_instruction=system_prompt,
+            )
+            for chunk in model.generate_content(user_prompt, stream=True):
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk without text parts (e.g. only a finish reason)
+                    continue
+                started = True
+                yield text
+            return
+        except Exception as exc:  # pragma: no cover - depends on remote API
+            msg = str(exc)
+            quota = "ResourceExhausted" in msg or "quota" in msg or "429" in msg
+            if started or not allow_pro or not quota:
+                raise
+
+
+_JSON_STRING = r'"((?:[^"\\]|\\.)*)"'
+
+
+class _PlanStreamParser:
+    """
+    Pulls completed fields out of a partially streamed enhancement-plan JSON.
+
+    `feed()` returns ("heading" | "subtitle" | "bullet", value) pairs for
+    every value that has fully arrived since the previous call.
+    """
+
+    _SCALARS = {
+        name: re.compile(rf'"{name}"\s*:\s*{_JSON_STRING}')
+        for name in ("heading", "subtitle")
+    }
+    _BULLETS_START = re.compile(r'"bullets"\s*:\s*\[')
+    _NEXT_STRING = re.compile(rf"\s*,?\s*{_JSON_STRING}")
+
+    def __init__(self):
+        self.buffer = ""
+        self._sent: set = set()
+        self._bullets_sent = 0
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        self.buffer += text
+        events: List[Tuple[str, Any]] = []
+
+        for name, pattern in self._SCALARS.items():
+            if name in self._sent:
+                continue
+            match = pattern.search(self.buffer)
+            if match:
+                self._sent.add(name)
+                events.append((name, json.loads(f'"{match.group(1)}"')))
+
+        start = self._BULLETS_START.search(self.buffer)
+        if start:
+            bullets = []
+            pos = start.end()
+            while (match := self._NEXT_STRING.match(self.buffer, pos)):
+                bullets.append(match.group(1))
+                pos = match.end()
+            for raw in bullets[self._bullets_sent:]:
+                events.append(("bullet", json.loads(f'"{raw}"')))
+            self._bullets_sent = len(bullets)
+
+        return events
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json_utils.dumps(data)}\n\n"
+
+
+@router.get("/plan/{document_id}/stream")
+async def stream_enhancement_plan(document_id: str, refresh: bool = False):
+    """
+    Server-Sent Events version of `/plan/{document_id}`.
+
+    Emits `heading`, `subtitle` and one `bullet` event per highlight as soon
+    as each value has streamed in from Gemini, then a final `plan` event
+    with the complete ProductEnhancementPlan (or an `error` event). Cached
+    plans are replayed immediately. Clients that cannot use SSE should keep
+    calling `/plan/{document_id}`.
     """
     # Ensure document is cached (fetch from Supermemory if needed)
     reel = await _ensure_document_cached(document_id)
 
     extraction: Dict[str, Any] = reel.get("extraction") or {}
     raw_data = extraction.get("raw_data") or extraction
+    key = _plan_cache_key("plan", document_id, extraction)
+    cached = None if refresh else _plan_cache_get(key)
+    if cached is None:
+        direct = _direct_plan(extraction)
+        cached = direct.model_dump() if direct is not None else None
+
+    async def event_stream():
+        if cached is not None:
+            plan = ProductEnhancementPlan(**cached)
+            yield _sse("heading", plan.heading)
+            if plan.subtitle:
+                yield _sse("subtitle", plan.subtitle)
+            for bullet in plan.bullets:
+                yield _sse("bullet", bullet)
+            yield _sse("plan", plan.model_dump())
+            return
+
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        parser = _PlanStreamParser()
+
+        def produce() -> None:
+            # Runs in a worker thread: the Gemini SDK stream is blocking.
+            try:
+                for text in _stream_gemini_plan_text(extraction, raw_data):
+                    loop.call_soon_threadsafe(chunks.put_nowait, text)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+        while (text := await chunks.get()) is not None:
+            for event, value in parser.feed(text):
+                yield _sse(event, value)
 
-    return _call_gemini_for_plan(extraction, raw_data)
+        try:
+            await producer
+            plan = _plan_from_data(json_utils.loads(parser.buffer))
+        except Exception as exc:
+            yield _sse("error", {"detail": getattr(exc, "detail", None) or str(exc)})
+            return
+        _plan_cache_put(key, plan)
+        yield _sse("plan", plan.model_dump())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/intelligence-plan/{document_id}", response_model=ProductEnhancementPlan)
-async def intelligence_enhancement_plan(document_id: str) -> ProductEnhancementPlan:
+async def intelligence_enhancement_plan(document_id: str, refresh: bool = False) -> ProductEnhancementPlan:
     """
     Enhancement plan powered by the multi-agent Reel Intelligence flow.
 
     This reuses the same compact UI-friendly shape as ProductEnhancementPlan
     so existing front-end code (e.g. `gx-ai-plan-section` in `code.html`)
     can render heading, subtitle, bullets, and suggested actions.
+    The multi-agent result is cached per extraction; pass `?refresh=1` to rerun it.
     """
     # Ensure document is cached (fetch from Supermemory if needed)
     reel = await _ensure_document_cached(document_id)
@@ -460,8 +912,6 @@ async def intelligence_enhancement_plan(document_id: str) -> ProductEnhancementP
         "documentId": document_id,
         "title": extraction.get("title") or raw_data.get("title"),
         "summary": extraction.get("description") or raw_data.get("summary"),
-        # Pack raw_data as the content payload expected by the agent.
-        "content": json.dumps(raw_data),
         "metadata": {
             "source_url": extraction.get("source_url") or raw_data.get("source_url"),
             "extracted_at": reel.get("created_at"),
@@ -470,13 +920,21 @@ async def intelligence_enhancement_plan(document_id: str) -> ProductEnhancementP
     keyframe_images: List[Dict[str, Any]] = raw_data.get("_keyframes") or []
     custom_id = raw_data.get("_custom_id") or ""
 
-    # Run the multi-agent intelligence flow.
-    intelligence = generate_reel_intelligence(
-        document_id=document_id,
-        custom_id=custom_id,
-        main_document=main_document,
-        keyframe_images=keyframe_images,
-    )
+    # Run the multi-agent intelligence flow (several Gemini calls) unless
+    # this exact extraction was already analysed.
+    cache_key = _plan_cache_key("intelligence", document_id, extraction)
+    intelligence = None if refresh else _plan_cache_get(cache_key)
+    if intelligence is None:
+        intelligence = await asyncio.to_thread(
+            generate_reel_intelligence,
+            document_id=document_id,
+            custom_id=custom_id,
+            main_document=main_document,
+            keyframe_images=keyframe_images,
+            # Hand raw_data over as-is rather than as a JSON string to re-parse.
+            content_dict=raw_data,
+        )
+        _plan_cache_put(cache_key, intelligence)
 
     ctx: Dict[str, Any] = intelligence.get("reel_context") or {}
     understanding: Dict[str, Any] = intelligence.get("content_understanding") or {}
@@ -566,49 +1024,35 @@ def _call_gemini_for_reconstruct(
     improved heading/subtitle.
     """
 
-    import json
-    import re
-
     category = (extraction.get("category") or "").lower()
     system_prompt = _build_system_prompt(category)
     user_prompt = _build_reconstruct_prompt(extraction, raw_data)
+    generation_config = RECONSTRUCT_GENERATION_CONFIG
 
+    # Reconstruction is a background-quality rewrite, not an interactive
+    # answer, so it goes straight to the cheaper flash tier instead of Pro.
     try:
-        model = _get_gemini_model(allow_pro=True)
-        resp = model.generate_content([system_prompt, user_prompt])
+        model = _get_gemini_model(
+            allow_pro=False,
+            generation_config=generation_config,
+            system_instruction=system_prompt,
+        )
+        resp = model.generate_content(user_prompt)
+    except HTTPException:
+        raise
     except Exception as exc:  # pragma: no cover
-        msg = str(exc)
-        if "ResourceExhausted" in msg or "quota" in msg or "429" in msg:
-            model = _get_gemini_model(allow_pro=False)
-            resp = model.generate_content([system_prompt, user_prompt])
-        else:
-            raise HTTPException(
-                status_code=502,
-                detail=f"Gemini error while generating reconstruction plan: {exc}",
-            ) from exc
+        raise HTTPException(
+            status_code=502,
+            detail=f"Gemini error while generating reconstruction plan: {exc}",
+        ) from exc
 
     text = resp.text or ""
-    
-    # Try to extract JSON from code blocks first (```json ... ```)
-    json_block_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
-    if json_block_match:
-        json_str = json_block_match.group(1)
-    else:
-        # Fall back to finding raw JSON object
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not match:
-            raise HTTPException(
-                status_code=502,
-                detail="Gemini did not return a JSON object for the reconstruction plan.",
-            )
-        json_str = match.group(0)
 
     try:
-        data = json.loads(json_str)
+        data = json_utils.loads(text)
     except json.JSONDecodeError as exc:
         # Log the problematic JSON for debugging
         print(f"Failed to parse JSON from Gemini. Raw response:\n{text}")
-        print(f"Extracted JSON string:\n{json_str}")
         raise HTTPException(
             status_code=502,
             detail=f"Failed to parse reconstruction JSON from Gemini: {exc}",
@@ -632,7 +1076,7 @@ def _call_gemini_for_reconstruct(
 
 
 @router.get("/reconstruct/{document_id}", response_model=ReconstructionPlan)
-async def reconstruct_reel(document_id: str) -> ReconstructionPlan:
+async def reconstruct_reel(document_id: str, refresh: bool = False) -> ReconstructionPlan:
     """
     Ask Gemini to produce a cleaned/restructured raw_data for this reel, plus
     optional improved heading/subtitle.
@@ -640,13 +1084,20 @@ async def reconstruct_reel(document_id: str) -> ReconstructionPlan:
     The frontend can then replace its in-memory raw_data with this object and
     re-render all sections (ingredients/items, details, steps, additional
     context) based on the new structure.
+    Pass `?refresh=1` to bypass the plan cache.
     """
     # Ensure document is cached (fetch from Supermemory if needed)
     reel = await _ensure_document_cached(document_id)
 
     extraction: Dict[str, Any] = reel.get("extraction") or {}
-    raw_data = extraction.get("raw_data") or extraction
+    key = _plan_cache_key("reconstruct", document_id, extraction)
+    cached = None if refresh else _plan_cache_get(key)
+    if cached is not None:
+        return ReconstructionPlan(**cached)
 
-    return _call_gemini_for_reconstruct(extraction, raw_data)
+    raw_data = extraction.get("raw_data") or extraction
+    plan = await asyncio.to_thread(_call_gemini_for_reconstruct, extraction, raw_data)
+    _plan_cache_put(key, plan)
+    return plan
 
 
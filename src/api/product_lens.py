@@ -7,23 +7,61 @@ This is used primarily for product reels: the generic view can call
 open real "buy" links for the user.
 """
 
+import asyncio
+import hashlib
 import os
-from typing import Any, Dict, List, Optional
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import requests
+import httpx
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from src.api.reels import REELS
+from src.api.reels import REELS_VIEW
+from src.utils import json_utils
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
 
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY", "")
+SERPAPI_SEARCH_URL = "https://serpapi.com/search"
+
+# Pooled SerpApi clients, created on first use: an async one for the Lens
+# endpoints and a sync one for `search_amazon_product` (called from worker
+# threads by the intelligence agent). Closed by `close_http_clients()`.
+_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+_SYNC_CLIENT: Optional[httpx.Client] = None
+_CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+# Transient SerpApi gateway errors are retried with backoff (0.3s, 0.6s).
+_SERPAPI_RETRY_STATUSES = {502, 503, 504}
+SERPAPI_MAX_RETRIES = 2
+
+# Raw Lens responses keyed by image URL (LRU, bounded, with a TTL). Results are
+# normalized per request, so shopping-domain filter changes apply immediately.
+LENS_CACHE_MAX_ENTRIES = 512
+LENS_CACHE_TTL_SECONDS = 3600
+_LENS_CACHE: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Lens bodies above this size are JSON-decoded, and result lists with at least
+# this many raw matches normalized, in a worker thread off the event loop.
+LARGE_LENS_RESPONSE_BYTES = 256 * 1024
+LENS_THREAD_MIN_MATCHES = 100
+
+# The only sections of a Lens response the endpoints read; everything else
+# (related content, knowledge graph, ...) is dropped before caching.
+_LENS_RESPONSE_KEYS = ("visual_matches", "product_results", "search_metadata")
 
 # Major e-commerce domains to filter for shopping links
-SHOPPING_DOMAINS = [
+SHOPPING_DOMAINS = (
     "amazon.com", "amazon.co.uk", "amazon.de", "amazon.fr", "amazon.ca", "amazon.in",
     "ebay.com", "ebay.co.uk", "ebay.de", "ebay.fr", "ebay.ca", "ebay.in",
     "walmart.com", "target.com", "bestbuy.com", "homedepot.com", "lowes.com",
@@ -33,7 +71,18 @@ SHOPPING_DOMAINS = [
     "sephora.com", "ulta.com", "nike.com", "adidas.com",
     "flipkart.com", "myntra.com", "ajio.com", "snapdeal.com",
     "shop", "store", "buy"  # Generic shopping keywords in domain
-]
+)
+_SHOPPING_PATTERNS = tuple(d.lower() for d in SHOPPING_DOMAINS)
+
+# Single-pass multi-pattern matcher over the lowercased link: an Aho-Corasick
+# automaton when pyahocorasick is installed, else one regex alternation.
+if AHOCORASICK_AVAILABLE:
+    _SHOPPING_AC = ahocorasick.Automaton()
+    for _pattern in _SHOPPING_PATTERNS:
+        _SHOPPING_AC.add_word(_pattern, _pattern)
+    _SHOPPING_AC.make_automaton()
+else:
+    _SHOPPING_RE = re.compile("|".join(re.escape(d) for d in _SHOPPING_PATTERNS))
 
 
 def _is_shopping_link(link: str) -> bool:
@@ -41,25 +90,30 @@ def _is_shopping_link(link: str) -> bool:
     if not link:
         return False
     link_lower = link.lower()
-    return any(domain in link_lower for domain in SHOPPING_DOMAINS)
+    if AHOCORASICK_AVAILABLE:
+        return next(_SHOPPING_AC.iter(link_lower), None) is not None
+    return _SHOPPING_RE.search(link_lower) is not None
+
+
+_THUMBNAIL_KEYS = ("image", "url", "src", "href")
+_NUMBER_TYPES = (int, float)
 
 
 def _extract_thumbnail_url(thumb_data):
     """Extract thumbnail URL from various possible formats."""
-    if not thumb_data:
-        return None
-    
-    # If it's already a string URL, return it
-    if isinstance(thumb_data, str):
-        return thumb_data
-    
-    # If it's a dict, try various possible keys
-    if isinstance(thumb_data, dict):
-        # Try common keys in order of preference
-        for key in ['image', 'url', 'src', 'href']:
-            if key in thumb_data and isinstance(thumb_data[key], str):
-                return thumb_data[key]
-    
+    # Fast path: SerpApi usually sends the URL as a plain string
+    if type(thumb_data) is str:
+        return thumb_data or None
+
+    # Otherwise expect a dict and try common keys in order of preference
+    for key in _THUMBNAIL_KEYS:
+        try:
+            value = thumb_data[key]
+        except (TypeError, KeyError, IndexError):
+            continue
+        if type(value) is str:
+            return value
+
     return None
 
 
@@ -71,117 +125,130 @@ def _extract_price_info(item: Dict[str, Any]) -> tuple:
     """
     price = item.get("price")
     currency = item.get("currency")
-    
+
+    # Fast path: price already a display string (e.g. "$29.99")
+    if type(price) is str:
+        stripped = price.strip()
+        if stripped:
+            return (stripped, str(currency) if currency else None)
+
     # Handle price as dict (e.g., {"value": "29.99", "currency": "USD"})
-    if isinstance(price, dict):
+    elif type(price) is dict:
         price_value = price.get("value") or price.get("amount") or price.get("price")
         price_currency = price.get("currency") or currency
         return (str(price_value) if price_value else None, 
                 str(price_currency) if price_currency else None)
-    
+
     # Handle extracted_price field (common in SerpAPI)
-    if not price and "extracted_price" in item:
-        price = item["extracted_price"]
-    
+    if not price:
+        try:
+            price = item["extracted_price"]
+        except KeyError:
+            pass
+
     # Convert price to string if it's a number
-    if isinstance(price, (int, float)):
-        price = str(price)
-    
-    # Only return string prices
-    if isinstance(price, str) and price.strip():
+    if type(price) in _NUMBER_TYPES:
+        return (str(price), str(currency) if currency else None)
+    if type(price) is str and price.strip():
         return (price.strip(), str(currency) if currency else None)
-    
+
     return (None, None)
 
 
-def _normalize_visual_matches(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-  normalized: List[Dict[str, Any]] = []
+def _normalize_matches(matches: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+  """Yield shopping matches (visual or product results) in the response shape."""
   for m in matches or []:
     if not isinstance(m, dict):
       continue
-    
-    # Filter for shopping links only
+
+    # Filter for shopping links only, and skip entries without a usable thumbnail
     link = m.get("link")
     if not _is_shopping_link(link):
       continue
-    
-    # Extract thumbnail URL properly
     thumb = _extract_thumbnail_url(m.get("thumbnail"))
-    
-    # Skip if no valid thumbnail
     if not thumb:
       continue
-    
-    # Extract price and currency properly
+
     price, currency = _extract_price_info(m)
-    
-    normalized.append(
-      {
-        "title": m.get("title"),
-        "link": link,
-        "source": m.get("source"),
-        "thumbnail": thumb,
-        "price": price,
-        "currency": currency,
-      }
-    )
-  return normalized
+    yield {
+      "title": m.get("title"),
+      "link": link,
+      "source": m.get("source"),
+      "thumbnail": thumb,
+      "price": price,
+      "currency": currency,
+    }
 
 
-def _normalize_product_matches(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-  normalized: List[Dict[str, Any]] = []
-  for p in matches or []:
-    if not isinstance(p, dict):
-      continue
-    
-    # Filter for shopping links only
-    link = p.get("link")
-    if not _is_shopping_link(link):
-      continue
-    
-    # Extract thumbnail URL properly
-    thumb = _extract_thumbnail_url(p.get("thumbnail"))
-    
-    # Skip if no valid thumbnail
-    if not thumb:
-      continue
-    
-    # Extract price and currency properly
-    price, currency = _extract_price_info(p)
-    
-    normalized.append(
-      {
-        "title": p.get("title"),
-        "link": link,
-        "source": p.get("source"),
-        "price": price,
-        "currency": currency,
-        "thumbnail": thumb,
-      }
+def _get_async_client() -> httpx.AsyncClient:
+  global _ASYNC_CLIENT
+  if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+    _ASYNC_CLIENT = httpx.AsyncClient(
+      timeout=30.0,
+      # Connection-level retries; 5xx retries live in `_serpapi_get`.
+      transport=httpx.AsyncHTTPTransport(retries=SERPAPI_MAX_RETRIES, limits=_CLIENT_LIMITS),
     )
-  return normalized
-
-
-class ImageURLRequest(BaseModel):
-    image_url: str
+  return _ASYNC_CLIENT
 
 
-@router.get("/lens/{document_id}")
-async def product_lens_search(document_id: str):
-  """
-  Use SerpApi Google Lens to search for visually similar / matching products
-  based on the reel's thumbnail image.
+def _get_sync_client() -> httpx.Client:
+  global _SYNC_CLIENT
+  if _SYNC_CLIENT is None or _SYNC_CLIENT.is_closed:
+    _SYNC_CLIENT = httpx.Client(
+      timeout=30.0,
+      transport=httpx.HTTPTransport(retries=SERPAPI_MAX_RETRIES, limits=_CLIENT_LIMITS),
+    )
+  return _SYNC_CLIENT
+
+
+async def close_http_clients() -> None:
+  """Close the pooled SerpApi clients, if they were opened."""
+  global _ASYNC_CLIENT, _SYNC_CLIENT
+  if _ASYNC_CLIENT is not None:
+    await _ASYNC_CLIENT.aclose()
+    _ASYNC_CLIENT = None
+  if _SYNC_CLIENT is not None:
+    _SYNC_CLIENT.close()
+    _SYNC_CLIENT = None
+
+
+async def _serpapi_get(url: str, params: Dict[str, Any]) -> httpx.Response:
+  """GET a SerpApi URL on the pooled async client, retrying on 502/503/504."""
+  client = _get_async_client()
+  for attempt in range(SERPAPI_MAX_RETRIES + 1):
+    resp = await client.get(url, params=params)
+    if resp.status_code not in _SERPAPI_RETRY_STATUSES or attempt == SERPAPI_MAX_RETRIES:
+      break
+    await asyncio.sleep(0.3 * 2 ** attempt)
+  return resp
+
+
+def _serpapi_get_sync(url: str, params: Dict[str, Any]) -> httpx.Response:
+  """Blocking counterpart of `_serpapi_get` for worker-thread callers."""
+  client = _get_sync_client()
+  for attempt in range(SERPAPI_MAX_RETRIES + 1):
+    resp = client.get(url, params=params)
+    if resp.status_code not in _SERPAPI_RETRY_STATUSES or attempt == SERPAPI_MAX_RETRIES:
+      break
+    time.sleep(0.3 * 2 ** attempt)
+  return resp
+
+
+async def _serpapi_lens(image_url: str) -> Dict[str, Any]:
   """
-  if not SERPAPI_API_KEY:
-    raise HTTPException(status_code=500, detail="SERPAPI_API_KEY not configured")
-
-  reel = REELS.get(document_id)
-  if not reel:
-    raise HTTPException(status_code=404, detail="Unknown document_id")
+  Run a SerpApi Google Lens search for an image URL and return the raw JSON,
+  trimmed to the sections the endpoints use.
 
-  image_url = reel.get("thumbnail_url")
-  if not image_url:
-    raise HTTPException(status_code=400, detail="No thumbnail available for this reel")
+  Successful responses are cached for LENS_CACHE_TTL_SECONDS.
+  """
+  key = hashlib.blake2b(image_url.encode("utf-8"), digest_size=16).hexdigest()
+  entry = _LENS_CACHE.get(key)
+  if entry is not None:
+    stored_at, cached = entry
+    if time.monotonic() - stored_at <= LENS_CACHE_TTL_SECONDS:
+      _LENS_CACHE.move_to_end(key)
+      return cached
+    _LENS_CACHE.pop(key, None)
 
   params = {
     "api_key": SERPAPI_API_KEY,
@@ -190,7 +257,7 @@ async def product_lens_search(document_id: str):
   }
 
   try:
-    resp = requests.get("https://serpapi.com/search", params=params, timeout=30)
+    resp = await _serpapi_get(SERPAPI_SEARCH_URL, params)
   except Exception as e:
     raise HTTPException(status_code=502, detail=f"Error contacting SerpApi: {e}")
 
@@ -200,16 +267,74 @@ async def product_lens_search(document_id: str):
       detail=f"SerpApi error {resp.status_code}: {resp.text[:200]}",
     )
 
-  data = resp.json()
+  body = resp.content
+  if len(body) > LARGE_LENS_RESPONSE_BYTES:
+    data = await asyncio.to_thread(json_utils.loads, body)
+  else:
+    data = json_utils.loads(body)
+  data = {k: data[k] for k in _LENS_RESPONSE_KEYS if k in data}
+  _LENS_CACHE[key] = (time.monotonic(), data)
+  _LENS_CACHE.move_to_end(key)
+  while len(_LENS_CACHE) > LENS_CACHE_MAX_ENTRIES:
+    _LENS_CACHE.popitem(last=False)
+  return data
+
+
+def cache_size() -> int:
+  """Number of entries in the Google Lens response cache."""
+  return len(_LENS_CACHE)
+
 
-  visual_matches = _normalize_visual_matches(data.get("visual_matches") or [])
-  product_matches = _normalize_product_matches(data.get("product_results") or [])
+def _normalize_lens_results(data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+  """Return (visual_matches, product_matches) normalized from a raw Lens response."""
+  visual_matches = list(_normalize_matches(data.get("visual_matches") or []))
+  product_matches = list(_normalize_matches(data.get("product_results") or []))
+  return visual_matches, product_matches
 
-  return {
+
+async def _lens_results(data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+  """Normalize Lens results, in a worker thread when the response is large."""
+  raw_count = len(data.get("visual_matches") or []) + len(data.get("product_results") or [])
+  if raw_count >= LENS_THREAD_MIN_MATCHES:
+    return await asyncio.to_thread(_normalize_lens_results, data)
+  return _normalize_lens_results(data)
+
+
+async def _do_lens_search(image_url: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+  """Search Lens for an image and return (response payload, raw Lens data)."""
+  data = await _serpapi_lens(image_url)
+  visual_matches, product_matches = await _lens_results(data)
+  payload = {
     "image_url": image_url,
     "visual_matches": visual_matches,
     "product_matches": product_matches,
   }
+  return payload, data
+
+
+class ImageURLRequest(BaseModel):
+    image_url: str
+
+
+@router.get("/lens/{document_id}")
+async def product_lens_search(document_id: str):
+  """
+  Use SerpApi Google Lens to search for visually similar / matching products
+  based on the reel's thumbnail image.
+  """
+  if not SERPAPI_API_KEY:
+    raise HTTPException(status_code=500, detail="SERPAPI_API_KEY not configured")
+
+  reel = REELS_VIEW.get(document_id)
+  if not reel:
+    raise HTTPException(status_code=404, detail="Unknown document_id")
+
+  image_url = reel.get("thumbnail_url")
+  if not image_url:
+    raise HTTPException(status_code=400, detail="No thumbnail available for this reel")
+
+  payload, _ = await _do_lens_search(image_url)
+  return payload
 
 
 @router.post("/lens/search-by-url")
@@ -225,34 +350,9 @@ async def product_lens_search_by_url(request: ImageURLRequest):
     if not image_url:
         raise HTTPException(status_code=400, detail="image_url is required")
 
-    params = {
-        "api_key": SERPAPI_API_KEY,
-        "engine": "google_lens",
-        "url": image_url,
-    }
-
-    try:
-        resp = requests.get("https://serpapi.com/search", params=params, timeout=30)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Error contacting SerpApi: {e}")
-
-    if resp.status_code != 200:
-        raise HTTPException(
-            status_code=502,
-            detail=f"SerpApi error {resp.status_code}: {resp.text[:200]}",
-        )
-
-    data = resp.json()
-
-    visual_matches = _normalize_visual_matches(data.get("visual_matches") or [])
-    product_matches = _normalize_product_matches(data.get("product_results") or [])
-
-    return {
-        "image_url": image_url,
-        "visual_matches": visual_matches,
-        "product_matches": product_matches,
-        "google_lens_url": data.get("search_metadata", {}).get("google_lens_url", "")
-    }
+    payload, data = await _do_lens_search(image_url)
+    payload["google_lens_url"] = data.get("search_metadata", {}).get("google_lens_url", "")
+    return payload
 
 
 def search_amazon_product(query: str) -> Optional[Dict[str, Any]]:
@@ -270,9 +370,9 @@ def search_amazon_product(query: str) -> Optional[Dict[str, Any]]:
         "query": query,
     }
 
-    resp = requests.get("https://serpapi.com/search.json", params=params, timeout=30)
+    resp = _serpapi_get_sync("https://serpapi.com/search.json", params)
     resp.raise_for_status()
-    data = resp.json()
+    data = json_utils.loads(resp.content)
 
     for item in data.get("organic_results", []):
         asin = item.get("asin")
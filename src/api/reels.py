@@ -6,30 +6,158 @@ This wraps the existing `ReelExtractor` pipeline so the UI can interact
 with it over HTTP instead of via the CLI.
 """
 
+import asyncio
+import heapq
 import json
-import os
-from datetime import datetime
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 from uuid import uuid4
 
-import requests
-from dotenv import load_dotenv
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-from main import ReelExtractor
+from main import ReelExtractor, get_extractor
+from src.api.supermemory_http import (
+    KEYFRAME_FETCH_CONCURRENCY,
+    SM_DOCUMENT_CACHE_TTL_SECONDS,
+    _custom_ids_images_query,
+    _fetch_keyframe_docs,
+    _get_sm_client,
+    _result_url,
+    _search_keyframe_results,
+    _sm_get_document,
+    _sm_get_keyframe,
+    _sm_invalidate_document,
+    _sm_request,
+    _sm_search,
+    _sm_search_cached,
+)
 from src.models import GenericExtraction
+from src.utils import json_utils
 from src.utils.config import Config
 
+
+# Child of main.py's queue-backed "reel_extractor" logger: records go to a
+# background thread, and debug calls are skipped at the default INFO level.
+logger = logging.getLogger("reel_extractor.api")
+
 router = APIRouter(prefix="/api/reels", tags=["reels"])
 
 
+class LRUDict(OrderedDict):
+    """
+    Dict with a size cap: reads refresh an entry, and writes beyond
+    `maxsize` evict the least recently used one.
+
+    Reads and writes reorder the dict, so they hold a lock: extraction
+    threads store reels while request handlers look them up.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+            return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.maxsize:
+                self.popitem(last=False)
+
+    def pop(self, key, *default):
+        with self._lock:
+            return super().pop(key, *default)
+
+
+# Max reels/documents kept in memory; older entries are re-fetched on demand.
+REELS_CACHE_SIZE = 4096
+
 # NOTE: These are simple in-memory stores intended for local/dev usage.
-# In production you would replace these with Redis, a database, or
-# another persistent task/result store.
+# Both are bounded (see TASK_RESULT_* and REELS_CACHE_SIZE) but live in
+# this process only: run a single uvicorn worker, since a status poll
+# routed to another worker would not find its task. Sharing them across
+# workers or restarts needs Redis, a database, or another persistent
+# task/result store.
 TASKS: Dict[str, Dict[str, Any]] = {}
-REELS: Dict[str, Dict[str, Any]] = {}
+# Finished (completed/failed) tasks by finish time, oldest first. Their
+# records are dropped from TASKS once older than TASK_RESULT_TTL_SECONDS,
+# or oldest first beyond TASK_RESULT_MAX_ENTRIES; queued and running tasks
+# are never evicted.
+TASK_RESULT_TTL_SECONDS = 3600
+TASK_RESULT_MAX_ENTRIES = 5000
+_FINISHED_TASKS: "OrderedDict[str, float]" = OrderedDict()
+# Guards TASKS and _FINISHED_TASKS: extraction threads update task records
+# while request handlers read and prune them.
+_TASKS_LOCK = threading.Lock()
+# REELS is only read by id (detail views, agent endpoints). The feeds
+# (/search, /recent) list reels from Supermemory, never by scanning it.
+REELS: Dict[str, Dict[str, Any]] = LRUDict(REELS_CACHE_SIZE)
+# Read-only view of REELS for routers that only look reels up. Lookups go
+# through LRUDict.get, so they still refresh recency.
+REELS_VIEW: Mapping[str, Dict[str, Any]] = MappingProxyType(REELS)
+# Encoded `GET /{reel_id}` bodies. Each entry keeps the record it was built
+# from, so a reel stored again under the same id is re-encoded on next read.
+_REEL_JSON: Dict[str, Tuple[Dict[str, Any], bytes]] = LRUDict(REELS_CACHE_SIZE)
+# customId -> (expires_at, thumbnail URL or None) for search result cards.
+_THUMBNAILS: Dict[str, Tuple[float, Optional[str]]] = LRUDict(REELS_CACHE_SIZE)
+
+# Open status streams per task: (event loop, queue) pairs fed by _update_task.
+TASK_SUBSCRIBERS: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+# Dedicated workers for extraction jobs (Config.EXTRACTION_WORKERS), so a
+# burst of submissions queues here instead of occupying the threadpool that
+# serves sync endpoints. Created on first submit. Threads are enough: the
+# pipeline mostly waits on yt-dlp, ffmpeg and Gemini, keyframe work runs in
+# OpenCV/numpy, and Whisper already has its own process pool.
+_EXTRACTION_POOL: Optional[ThreadPoolExecutor] = None
+
+# Max snapshots buffered per status stream; older ones are dropped first.
+STATUS_STREAM_QUEUE_SIZE = 16
+# Seconds between keep-alive comments on an idle status stream.
+STATUS_STREAM_KEEPALIVE_SECONDS = 15
+# Upper bound for `/status/{task_id}?wait=` long-polls.
+STATUS_LONG_POLL_MAX_SECONDS = 30
+# Image hits requested by the batched thumbnail search on /search and /recent.
+THUMBNAIL_BATCH_SEARCH_LIMIT = 100
+# How long a customId's resolved thumbnail (or the lack of one, which may
+# change once its keyframes are stored) is reused by /search and /recent.
+THUMBNAIL_CACHE_TTL_SECONDS = 600
+THUMBNAIL_MISS_TTL_SECONDS = 60
+# Minimum spacing between progress updates within one extraction stage.
+PROGRESS_UPDATE_MIN_INTERVAL_SECONDS = 0.05
+# How long /search, /recent and /document wait for a free upstream slot
+# (Config.MAX_CONCURRENT_LOOKUPS) before answering 503.
+LOOKUP_SLOT_WAIT_SECONDS = 2.0
+
+# Shape of a submittable video link: http(s), a dotted host, optional path.
+# yt-dlp decides which platforms it can handle; this only rejects input
+# that is not a web URL before it takes an extraction worker.
+_VIDEO_URL_RE = re.compile(r"https?://[^\s/?#]+\.[^\s/?#]+(?:[/?#]\S*)?", re.IGNORECASE)
 
 
 class SubmitRequest(BaseModel):
@@ -70,6 +198,7 @@ class SearchResult(BaseModel):
     score: float
     category: Optional[str] = None
     summary: Optional[str] = None
+    custom_id: Optional[str] = None  # Groups the reel with its keyframe images
 
 class SearchResponse(BaseModel):
     """Response containing search results."""
@@ -82,124 +211,612 @@ class DocumentDetailsResponse(BaseModel):
     keyframes: list[Dict[str, Any]]
     custom_id: Optional[str] = None
 
-def _update_task(task_id: str, **fields: Any) -> None:
-    """Helper to update a task record if it exists."""
-    if task_id in TASKS:
-        TASKS[task_id].update(fields)
+def _put_latest(queue: asyncio.Queue, item: Dict[str, Any]) -> None:
+    """Enqueue without blocking, dropping the oldest snapshot when full."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
 
 
-@router.post("/submit", response_model=SubmitResponse)
-async def submit_reel(payload: SubmitRequest, background_tasks: BackgroundTasks):
+def _update_task(task_id: str, **fields: Any) -> None:
     """
-    Submit a new reel URL for processing.
+    Helper to update a task record if it exists.
 
-    Returns a task_id that can be used to poll `/api/reels/status/{task_id}`.
+    Also pushes the new snapshot to any open status streams. This runs on
+    the background extraction thread, so delivery is handed to each
+    subscriber's event loop.
+    """
+    with _TASKS_LOCK:
+        task = TASKS.get(task_id)
+        if task is None:
+            return
+        task.update(fields)
+        if fields.get("status") in ("completed", "failed"):
+            _FINISHED_TASKS[task_id] = time.monotonic()
+        snapshot = StatusResponse(task_id=task_id, **task).model_dump()
+    for loop, queue in list(TASK_SUBSCRIBERS.get(task_id, ())):
+        loop.call_soon_threadsafe(_put_latest, queue, snapshot)
+
+
+def _get_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Copy of a task record, or None if it is unknown (or expired)."""
+    with _TASKS_LOCK:
+        task = TASKS.get(task_id)
+        return dict(task) if task is not None else None
+
+
+def _reel_json(reel_id: str, reel: Dict[str, Any]) -> bytes:
+    """JSON body for a stored reel, encoded once per stored record."""
+    cached = _REEL_JSON.get(reel_id)
+    if cached is not None and cached[0] is reel:
+        return cached[1]
+    body = json_utils.dumps_bytes(reel)
+    _REEL_JSON[reel_id] = (reel, body)
+    return body
+
+
+def _prune_finished_tasks() -> None:
     """
-    task_id = str(uuid4())
-    TASKS[task_id] = {
-        "status": "queued",
-        "progress": 0,
-        "stage": "queued",
-        "reel_id": None,
-        "error": None,
+    Drop finished task records older than TASK_RESULT_TTL_SECONDS, then the
+    oldest ones until at most TASK_RESULT_MAX_ENTRIES remain.
+    """
+    cutoff = time.monotonic() - TASK_RESULT_TTL_SECONDS
+    with _TASKS_LOCK:
+        while _FINISHED_TASKS:
+            task_id, finished_at = next(iter(_FINISHED_TASKS.items()))
+            if finished_at > cutoff and len(_FINISHED_TASKS) <= TASK_RESULT_MAX_ENTRIES:
+                break
+            _FINISHED_TASKS.popitem(last=False)
+            TASKS.pop(task_id, None)
+
+
+def store_sizes() -> Dict[str, int]:
+    """Entry counts of the in-memory task and reel stores."""
+    with _TASKS_LOCK:
+        tasks, finished = len(TASKS), len(_FINISHED_TASKS)
+    return {
+        "tasks": tasks,
+        "tasks_finished": finished,
+        "reels": len(REELS),
+        "reel_bodies": len(_REEL_JSON),
     }
 
-    def run_extraction(task_id: str, url: str) -> None:
-        """Background task that runs the existing ReelExtractor pipeline."""
-        _update_task(task_id, status="processing", stage="downloading", progress=10)
 
-        extractor = ReelExtractor()
+def _get_extraction_pool() -> ThreadPoolExecutor:
+    """Lazily create the extraction worker pool."""
+    global _EXTRACTION_POOL
+    if _EXTRACTION_POOL is None:
+        _EXTRACTION_POOL = ThreadPoolExecutor(
+            max_workers=Config.EXTRACTION_WORKERS, thread_name_prefix="extraction"
+        )
+    return _EXTRACTION_POOL
+
+
+def shutdown_extraction_pool() -> None:
+    """Stop the extraction workers, dropping jobs that have not started."""
+    global _EXTRACTION_POOL
+    if _EXTRACTION_POOL is not None:
+        _EXTRACTION_POOL.shutdown(wait=False, cancel_futures=True)
+        _EXTRACTION_POOL = None
 
-        def progress_callback(stage: str, progress: int) -> None:
-            _update_task(task_id, stage=stage, progress=progress)
 
-        # Re-use the CLI pipeline, but tell it this is a URL and skip audio/transcription
-        result = extractor.extract(
-            input_source=url,
-            source_type="url",
-            preferred_category=None,
-            extract_keyframes=True,
-            extract_audio=False,
-            transcribe=False,
-            progress_callback=progress_callback,
+def _run_extraction(extractor: ReelExtractor, task_id: str, url: str) -> None:
+    """Extraction job: runs the ReelExtractor pipeline on a pool worker."""
+    try:
+        _extract_reel(extractor, task_id, url)
+    except Exception as e:
+        # Never leave a task stuck in "processing" if the pipeline blows up
+        _update_task(task_id, status="failed", stage="error", progress=100, error=str(e))
+
+
+def _extract_reel(extractor: ReelExtractor, task_id: str, url: str) -> None:
+    """Run the existing ReelExtractor pipeline for one task and store the reel."""
+    _update_task(task_id, status="processing", stage="downloading", progress=10)
+
+    # Progress ticks are coalesced: within a stage, ticks closer together
+    # than PROGRESS_UPDATE_MIN_INTERVAL_SECONDS are held back, and the latest
+    # held tick is published when the stage changes or the extraction ends.
+    last: Dict[str, Any] = {
+        "stage": "downloading",
+        "published_at": time.monotonic(),
+        "pending": None,
+    }
+
+    def flush_pending() -> None:
+        pending, last["pending"] = last["pending"], None
+        if pending is not None:
+            _update_task(task_id, stage=pending[0], progress=pending[1])
+
+    def progress_callback(stage: str, progress: int) -> None:
+        now = time.monotonic()
+        if stage == last["stage"]:
+            if progress < 100 and now - last["published_at"] < PROGRESS_UPDATE_MIN_INTERVAL_SECONDS:
+                last["pending"] = (stage, progress)
+                return
+            last["pending"] = None  # superseded by this tick
+        else:
+            flush_pending()
+        last["stage"], last["published_at"] = stage, now
+        _update_task(task_id, stage=stage, progress=progress)
+
+    # Re-use the CLI pipeline, but tell it this is a URL and skip audio/transcription
+    result = extractor.extract(
+        input_source=url,
+        source_type="url",
+        preferred_category=None,
+        extract_keyframes=True,
+        extract_audio=False,
+        transcribe=False,
+        progress_callback=progress_callback,
+    )
+    # `extract` has drained its progress updates; publish any held-back tick
+    flush_pending()
+
+    if not result["success"]:
+        _update_task(
+            task_id,
+            status="failed",
+            stage="error",
+            progress=100,
+            error="; ".join(result["errors"]),
         )
+        return
 
-        if not result["success"]:
-            _update_task(
-                task_id,
-                status="failed",
-                stage="error",
-                progress=100,
-                error="; ".join(result["errors"]),
-            )
-            return
+    extraction = result["extraction"]
+    reel_id = uuid4().hex
 
-        extraction = result["extraction"]
-        reel_id = str(uuid4())
+    is_generic = isinstance(extraction, GenericExtraction)
 
-        is_generic = isinstance(extraction, GenericExtraction)
+    # Convert thumbnail_path (if available) into a URL under the /temp mount
+    thumbnail_url: Optional[str] = None
+    thumb_path_str = result.get("thumbnail_path")
+    if thumb_path_str:
+        try:
+            thumb_path = Path(thumb_path_str)
+            # Derive path relative to TEMP_STORAGE_PATH to form the URL
+            rel_path = thumb_path.relative_to(Config.TEMP_STORAGE_PATH)
+            thumbnail_url = f"/temp/{rel_path.as_posix()}"
+        except Exception:
+            thumbnail_url = None
+
+    reel = {
+        "reel_id": reel_id,
+        "category": extraction.category,
+        "is_generic": is_generic,
+        "model_name": type(extraction).__name__,
+        "extraction": extraction.model_dump(),
+        "formatted_summary": extraction.get_formatted_summary() if is_generic else None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "source_url": getattr(extraction, "source_url", None),
+        "thumbnail_url": thumbnail_url,
+        "errors": result["errors"],
+    }
+    REELS[reel_id] = reel
+    # Encode the response body here on the worker, not on the first read.
+    _reel_json(reel_id, reel)
+
+    _update_task(task_id, status="completed", stage="done", progress=100, reel_id=reel_id)
 
-        # Convert thumbnail_path (if available) into a URL under the /temp mount
-        thumbnail_url: Optional[str] = None
-        thumb_path_str = result.get("thumbnail_path")
-        if thumb_path_str:
-            try:
-                thumb_path = Path(thumb_path_str)
-                # Derive path relative to TEMP_STORAGE_PATH to form the URL
-                rel_path = thumb_path.relative_to(Config.TEMP_STORAGE_PATH)
-                thumbnail_url = f"/temp/{rel_path.as_posix()}"
-            except Exception:
-                thumbnail_url = None
-
-        REELS[reel_id] = {
-            "reel_id": reel_id,
-            "category": extraction.category,
-            "is_generic": is_generic,
-            "model_name": type(extraction).__name__,
-            "extraction": extraction.model_dump(),
-            "formatted_summary": extraction.get_formatted_summary() if is_generic else None,
-            "created_at": datetime.utcnow().isoformat(),
-            "source_url": getattr(extraction, "source_url", None),
-            "thumbnail_url": thumbnail_url,
-            "errors": result["errors"],
-        }
 
-        _update_task(task_id, status="completed", stage="done", progress=100, reel_id=reel_id)
+async def _shared_extractor() -> ReelExtractor:
+    """
+    The process-wide extractor, as an async dependency: once it is built
+    (normally at startup) /submit no longer hops through the threadpool
+    that a sync `Depends(get_extractor)` would use on every request.
+    """
+    if get_extractor.cache_info().currsize:
+        return get_extractor()
+    return await run_in_threadpool(get_extractor)
 
-    background_tasks.add_task(run_extraction, task_id, payload.instagram_url)
+
+@router.post("/submit", response_model=SubmitResponse)
+async def submit_reel(
+    payload: SubmitRequest,
+    extractor: ReelExtractor = Depends(_shared_extractor),
+):
+    """
+    Submit a new reel URL for processing.
+
+    Returns a task_id that can be used to poll `/api/reels/status/{task_id}`.
+    Links that are not http(s) URLs are rejected with a 400 up front, and
+    a 429 is returned while Config.MAX_PENDING_EXTRACTIONS are in flight.
+    """
+    url = payload.instagram_url.strip()
+    if not _VIDEO_URL_RE.fullmatch(url):
+        raise HTTPException(status_code=400, detail="Please provide a valid http(s) reel URL")
+
+    _prune_finished_tasks()
+    task_id = uuid4().hex
+    with _TASKS_LOCK:
+        # Finished records stay in TASKS; the rest are queued or running
+        if len(TASKS) - len(_FINISHED_TASKS) >= Config.MAX_PENDING_EXTRACTIONS:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many reels are being processed right now; please try again shortly",
+            )
+        TASKS[task_id] = {
+            "status": "queued",
+            "progress": 0,
+            "stage": "queued",
+            "reel_id": None,
+            "error": None,
+        }
+
+    _get_extraction_pool().submit(_run_extraction, extractor, task_id, url)
 
     return SubmitResponse(task_id=task_id, status="queued", eta_seconds=120)
 
 
+def _subscribe(task_id: str) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+    """Register a queue that receives this task's status snapshots."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STATUS_STREAM_QUEUE_SIZE)
+    subscriber = (asyncio.get_running_loop(), queue)
+    TASK_SUBSCRIBERS.setdefault(task_id, []).append(subscriber)
+    return subscriber
+
+
+def _unsubscribe(task_id: str, subscriber: Tuple[asyncio.AbstractEventLoop, asyncio.Queue]) -> None:
+    subscribers = TASK_SUBSCRIBERS.get(task_id, [])
+    if subscriber in subscribers:
+        subscribers.remove(subscriber)
+    if not subscribers:
+        TASK_SUBSCRIBERS.pop(task_id, None)
+
+
 @router.get("/status/{task_id}", response_model=StatusResponse)
-async def get_status(task_id: str):
+async def get_status(task_id: str, wait: float = 0):
     """
     Check the status of a previously submitted reel.
 
-    Used by the Processing Status UI to drive progress updates.
+    With `wait` > 0 this is a long-poll: unless the task is already finished,
+    the response is held until the next progress update (or `wait` seconds,
+    capped at STATUS_LONG_POLL_MAX_SECONDS). Used by the Processing Status UI
+    when the SSE stream is unavailable.
+    """
+    task = _get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Unknown task_id")
+    if wait <= 0 or task["status"] in ("completed", "failed"):
+        return StatusResponse(task_id=task_id, **task)
+
+    subscriber = _subscribe(task_id)
+    try:
+        # An update may have landed (on the worker thread) before we subscribed
+        current = _get_task(task_id) or task
+        if current != task:
+            return StatusResponse(task_id=task_id, **current)
+        snapshot = await asyncio.wait_for(
+            subscriber[1].get(), timeout=min(wait, STATUS_LONG_POLL_MAX_SECONDS)
+        )
+        return StatusResponse(**snapshot)
+    except asyncio.TimeoutError:
+        return StatusResponse(task_id=task_id, **(_get_task(task_id) or task))
+    finally:
+        _unsubscribe(task_id, subscriber)
+
+
+@router.get("/status/{task_id}/stream")
+async def stream_status(task_id: str):
     """
-    task = TASKS.get(task_id)
+    Server-Sent Events stream of status updates for a task.
+
+    Sends the current status immediately, then one event per progress
+    update until the task completes or fails. Replaces polling
+    `/status/{task_id}` from the Processing Status UI.
+    """
+    task = _get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Unknown task_id")
-    return StatusResponse(task_id=task_id, **task)
 
+    async def event_stream():
+        # Subscribed inside the generator so a client that disconnects
+        # before the first event never leaves a subscriber behind.
+        subscriber = _subscribe(task_id)
+        queue = subscriber[1]
+        try:
+            # Re-read after subscribing so a terminal update that landed in
+            # between is not lost.
+            current = _get_task(task_id) or task
+            _put_latest(queue, StatusResponse(task_id=task_id, **current).model_dump())
+            while True:
+                try:
+                    snapshot = await asyncio.wait_for(
+                        queue.get(), timeout=STATUS_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Idle: re-check the store rather than trusting the queue alone.
+                    current = _get_task(task_id)
+                    if current is None:  # evicted from the task store
+                        return
+                    if current["status"] not in ("completed", "failed"):
+                        yield ": keep-alive\n\n"
+                        continue
+                    snapshot = StatusResponse(task_id=task_id, **current).model_dump()
+                yield f"data: {json_utils.dumps(snapshot)}\n\n"
+                if snapshot["status"] in ("completed", "failed"):
+                    return
+        finally:
+            _unsubscribe(task_id, subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/status/{task_id}/ws")
+async def status_websocket(websocket: WebSocket, task_id: str):
+    """
+    WebSocket variant of `/status/{task_id}/stream` for clients that prefer it.
+
+    Sends the current status on connect, then one JSON message per progress
+    update from the same subscriber queues, and closes once the task
+    completes or fails. Unknown task ids are refused before the handshake.
+    """
+    task = _get_task(task_id)
+    if not task:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+
+    subscriber = _subscribe(task_id)
+    queue = subscriber[1]
+    # Snapshot only once subscribed, so a terminal update cannot slip between.
+    task = _get_task(task_id) or task
+    _put_latest(queue, StatusResponse(task_id=task_id, **task).model_dump())
+    try:
+        while True:
+            try:
+                snapshot = await asyncio.wait_for(
+                    queue.get(), timeout=STATUS_STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Idle: re-check the store rather than trusting the queue alone.
+                current = _get_task(task_id)
+                if current is None:  # evicted from the task store
+                    await websocket.close()
+                    return
+                if current["status"] not in ("completed", "failed"):
+                    continue
+                snapshot = StatusResponse(task_id=task_id, **current).model_dump()
+            await websocket.send_text(json_utils.dumps(snapshot))
+            if snapshot["status"] in ("completed", "failed"):
+                await websocket.close()
+                return
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # client went away mid-task
+    finally:
+        _unsubscribe(task_id, subscriber)
+
+
+_LOOKUP_SLOTS: Optional[asyncio.Semaphore] = None
+
+
+async def _lookup_slot() -> AsyncIterator[None]:
+    """
+    Hold one of Config.MAX_CONCURRENT_LOOKUPS slots while a request fans out
+    to Supermemory.
+
+    A burst beyond the cap waits up to LOOKUP_SLOT_WAIT_SECONDS and then gets
+    a 503 with Retry-After, instead of queueing behind the client's
+    connection pool until it times out.
+    """
+    global _LOOKUP_SLOTS
+    if _LOOKUP_SLOTS is None:
+        _LOOKUP_SLOTS = asyncio.Semaphore(Config.MAX_CONCURRENT_LOOKUPS)
+    slots = _LOOKUP_SLOTS
+    if not slots.locked():
+        await slots.acquire()  # a slot is free: returns without waiting
+    elif not await _acquire_within(slots, LOOKUP_SLOT_WAIT_SECONDS):
+        raise HTTPException(
+            status_code=503,
+            detail="Too many lookups in progress; retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+async def _acquire_within(sem: asyncio.Semaphore, timeout: float) -> bool:
+    """
+    Acquire `sem` within `timeout` seconds; False if it timed out.
+
+    Unlike `wait_for(sem.acquire(), ...)` before Python 3.12, a permit that
+    is granted just as the timeout fires is handed back, not leaked.
+    """
+    acquire = asyncio.ensure_future(sem.acquire())
+    try:
+        done, _ = await asyncio.wait({acquire}, timeout=timeout)
+    except asyncio.CancelledError:
+        _abandon_acquire(sem, acquire)
+        raise
+    if done:
+        return True
+    _abandon_acquire(sem, acquire)
+    return False
+
+
+def _abandon_acquire(sem: asyncio.Semaphore, acquire: "asyncio.Future[bool]") -> None:
+    """Cancel a pending acquire, releasing the permit if it was already granted."""
+    if not acquire.cancel() and not acquire.cancelled() and acquire.exception() is None:
+        sem.release()
+
+
+def _supermemory_client() -> httpx.AsyncClient:
+    """Shared Supermemory client; 500 when no API key is configured."""
+    if not Config.SUPERMEMEORY_API_KEY:
+        raise HTTPException(status_code=500, detail="SUPERMEMORY_API_KEY not configured")
+    return _get_sm_client(Config.SUPERMEMEORY_API_KEY)
+
+
+async def _lookup_thumbnail(client: httpx.AsyncClient, custom_id: str) -> Optional[str]:
+    """
+    Find a cover image for a text document by looking up an image document
+    that shares the same customId (keyframes stored alongside the text
+    document). Returns None if there is none or the lookup fails.
+    """
+    try:
+        img_results = await _search_keyframe_results(client, custom_id, limit=1)
+    except (httpx.HTTPError, ValueError):
+        return None
+    for img_result in img_results:
+        # The search hit usually carries the image URL; only fetch the
+        # document when it does not.
+        thumbnail_url = _result_url(img_result)
+        if thumbnail_url:
+            return thumbnail_url
+        try:
+            img_doc, _ = await _sm_get_keyframe(client, img_result["documentId"])
+        except (httpx.HTTPError, ValueError):
+            continue
+        # Prefer direct URL from the image document if available.
+        thumbnail_url = (
+            img_doc.get("url")
+            or img_doc.get("metadata", {}).get("thumbnail_url")
+            or img_doc.get("metadata", {}).get("image_url")
+        )
+        if thumbnail_url:
+            return thumbnail_url
+    return None
 
-@router.post("/search", response_model=SearchResponse)
-async def search_reels(payload: SearchRequest):
+
+async def _batch_thumbnail_urls(client: httpx.AsyncClient, custom_ids: List[str]) -> Dict[str, str]:
+    """
+    One image search covering several customIds; maps each customId to the
+    URL of its first hit that carries one. Ids without such a hit are
+    left out, as is everything when the search fails.
+    """
+    payload = _custom_ids_images_query(custom_ids, THUMBNAIL_BATCH_SEARCH_LIMIT)
+    try:
+        data, _ = await _sm_search_cached(client, payload, SM_DOCUMENT_CACHE_TTL_SECONDS)
+    except (httpx.HTTPError, ValueError):
+        return {}
+    wanted = {str(custom_id) for custom_id in custom_ids}
+    urls: Dict[str, str] = {}
+    for item in data.get("results", []):
+        if item.get("type") != "image":
+            continue
+        custom_id = str((item.get("metadata") or {}).get("customId"))
+        url = _result_url(item)
+        if url and custom_id in wanted and custom_id not in urls:
+            urls[custom_id] = url
+    return urls
+
+
+async def _fill_missing_thumbnails(
+    client: httpx.AsyncClient, pending: List[Tuple[SearchResult, str]]
+) -> None:
+    """
+    Look up thumbnails for (result, customId) pairs: memoized URLs first,
+    then one batched image search, then concurrent per-customId lookups
+    for any it missed. Outcomes (including misses) are memoized.
+    """
+    if not pending:
+        return
+    now = time.monotonic()
+    urls: Dict[str, Optional[str]] = {}
+    unresolved: List[str] = []
+    for custom_id in dict.fromkeys(custom_id for _, custom_id in pending):
+        entry = _THUMBNAILS.get(custom_id)
+        if entry is not None and entry[0] > now:
+            urls[custom_id] = entry[1]
+        else:
+            unresolved.append(custom_id)
+
+    if unresolved:
+        batch_urls = await _batch_thumbnail_urls(client, unresolved)
+        limit = asyncio.Semaphore(KEYFRAME_FETCH_CONCURRENCY)
+
+        async def lookup(custom_id: str) -> Optional[str]:
+            if str(custom_id) in batch_urls:
+                return batch_urls[str(custom_id)]
+            async with limit:
+                return await _lookup_thumbnail(client, custom_id)
+
+        found = await asyncio.gather(*(lookup(custom_id) for custom_id in unresolved))
+        now = time.monotonic()
+        for custom_id, url in zip(unresolved, found):
+            urls[custom_id] = url
+            ttl = THUMBNAIL_CACHE_TTL_SECONDS if url else THUMBNAIL_MISS_TTL_SECONDS
+            _THUMBNAILS[custom_id] = (now + ttl, url)
+
+    for result, custom_id in pending:
+        if urls.get(custom_id):
+            result.thumbnail_url = urls[custom_id]
+
+
+def _unique_text_items(items: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Lazily yield text results, first occurrence per documentId only."""
+    seen_ids = set()
+    for item in items:
+        if item.get("type") != "text":
+            continue
+        doc_id = item.get("documentId")
+        if not doc_id or doc_id in seen_ids:
+            continue
+        seen_ids.add(doc_id)
+        yield item
+
+
+# Sort key for /recent items without a usable timestamp (oldest possible).
+_DT_MIN = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _saved_at(metadata: Dict[str, Any]) -> datetime:
+    """
+    When a reel was saved, from its `extracted_at` (or `created_at`) metadata.
+
+    Timestamps without an offset are taken as UTC so stored naive and aware
+    values compare; missing or unparsable ones sort last as `_DT_MIN`.
+    """
+    value = metadata.get("extracted_at") or metadata.get("created_at")
+    if not isinstance(value, str) or not value:
+        return _DT_MIN
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return _DT_MIN
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _search_result(item: Dict[str, Any]) -> Tuple[SearchResult, Optional[str]]:
+    """Build a SearchResult from a text search hit; also returns its customId."""
+    doc_id = item.get("documentId")
+    metadata = item.get("metadata", {}) or {}
+    custom_id = metadata.get("customId")
+    result = SearchResult(
+        title=item.get("title") or metadata.get("topic") or "Untitled",
+        thumbnail_url=metadata.get("thumbnail_url") or metadata.get("image_url"),
+        reel_id=doc_id,
+        document_id=doc_id,
+        score=item.get("score", 0.0),
+        category=metadata.get("category"),
+        summary=item.get("summary") or metadata.get("summary"),
+        custom_id=str(custom_id) if custom_id else None,
+    )
+    return result, custom_id
+
+
+@router.post(
+    "/search",
+    response_model=SearchResponse,
+    dependencies=[Depends(_lookup_slot)],
+)
+async def search_reels(payload: SearchRequest, response: Response):
     """
     Search for reels using Supermemory API based on user query.
     
     Returns a list of matching reels with thumbnails and metadata.
-    Filters for text-type results and removes duplicates.
+    Filters for text-type results and removes duplicates. Identical
+    searches are served from cache for a minute (`X-Cache: HIT`).
     """
-    load_dotenv()
-    api_key = os.environ.get("SUPERMEMORY_API_KEY")
-    
-    if not api_key:
-        raise HTTPException(status_code=500, detail="SUPERMEMORY_API_KEY not configured")
-    
-    url = "https://api.supermemory.ai/v3/search"
-    
+    client = _supermemory_client()
+
     search_payload = {
         "q": payload.query,
         "chunkThreshold": 0.6,
@@ -208,114 +825,39 @@ async def search_reels(payload: SearchRequest):
         "limit": payload.limit
     }
     
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
     try:
-        response = requests.post(url, json=search_payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        # Extract unique results (filter text type and remove duplicates)
-        seen_ids = set()
-        results = []
-        
-        for item in data.get("results", []):
-            item_type = item.get("type")
-            doc_id = item.get("documentId")
-            
-            # Filter only text type results
-            if item_type != "text":
-                continue
-            
-            # Skip duplicates
-            if not doc_id or doc_id in seen_ids:
-                continue
-            seen_ids.add(doc_id)
-            
-            # Extract metadata
-            metadata = item.get("metadata", {}) or {}
-            title = item.get("title") or metadata.get("topic") or "Untitled"
-            thumbnail_url = metadata.get("thumbnail_url") or metadata.get("image_url")
-            category = metadata.get("category")
-            summary = item.get("summary") or metadata.get("summary")
-            custom_id = metadata.get("customId")
-            
-            # If we don't already have a thumbnail, try to find one by looking up
-            # an image document that shares the same customId (keyframes stored
-            # alongside the text document). This mirrors the behavior of /recent
-            # so that search results also show cover images.
-            if not thumbnail_url and custom_id:
-                try:
-                    img_search_payload = {
-                        "q": "images",
-                        "chunkThreshold": 0.5,
-                        "filters": {
-                            "AND": [
-                                {
-                                    "key": "customId",
-                                    "value": custom_id,
-                                    "negate": False,
-                                }
-                            ]
-                        },
-                        "limit": 1,
-                    }
-                    img_resp = requests.post(
-                        url, json=img_search_payload, headers=headers, timeout=30
-                    )
-                    img_resp.raise_for_status()
-                    img_data = img_resp.json()
-                    for img_item in img_data.get("results", []):
-                        if img_item.get("type") != "image":
-                            continue
-                        img_doc_id = img_item.get("documentId")
-                        if img_doc_id:
-                            try:
-                                doc_url = f"https://api.supermemory.ai/v3/documents/{img_doc_id}"
-                                doc_resp = requests.get(doc_url, headers=headers, timeout=30)
-                                doc_resp.raise_for_status()
-                                img_doc = doc_resp.json()
-                                thumbnail_url = (
-                                    img_doc.get("url")
-                                    or img_doc.get("metadata", {}).get("thumbnail_url")
-                                    or img_doc.get("metadata", {}).get("image_url")
-                                )
-                                if thumbnail_url:
-                                    break
-                            except requests.RequestException:
-                                continue
-                except requests.RequestException:
-                    # If thumbnail enrichment fails, we still return the text result.
-                    pass
-            
-            # Create search result
-            result = SearchResult(
-                title=title,
-                thumbnail_url=thumbnail_url,
-                reel_id=doc_id,
-                document_id=doc_id,
-                score=item.get("score", 0.0),
-                category=category,
-                summary=summary,
-            )
-            results.append(result)
-            print(f"result: {result}")
-            # Stop if we've reached the limit
-            if len(results) >= payload.limit:
-                break
-        
-        return SearchResponse(
-            results=results,
-            total=len(results)
-        )
-        
-    except requests.RequestException as e:
+        data, cache_hit = await _sm_search_cached(client, search_payload)
+    except (httpx.HTTPError, ValueError) as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+    response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+
+    # Unique text results, built only until the limit is reached
+    results = []
+    pending_thumbnails: List[Tuple[SearchResult, str]] = []
+    for item in islice(_unique_text_items(data.get("results", [])), max(payload.limit, 1)):
+        result, custom_id = _search_result(item)
+        results.append(result)
+        # Results without a thumbnail get one from their keyframes below,
+        # mirroring /recent so search results also show cover images.
+        if not result.thumbnail_url and custom_id:
+            pending_thumbnails.append((result, custom_id))
+
+    # Thumbnail enrichment is best-effort: failed lookups leave it empty
+    await _fill_missing_thumbnails(client, pending_thumbnails)
+    for result in results:
+        logger.debug("result: %r", result)
+    
+    return SearchResponse(
+        results=results,
+        total=len(results)
+    )
 
 
-@router.get("/recent", response_model=SearchResponse)
+@router.get(
+    "/recent",
+    response_model=SearchResponse,
+    dependencies=[Depends(_lookup_slot)],
+)
 async def recent_reels(limit: int = 10):
     """
     Return the most recently saved reels from Supermemory.
@@ -328,13 +870,7 @@ async def recent_reels(limit: int = 10):
     load on the upstream API. Even if the client asks for a large value,
     we only return up to 20 items.
     """
-    load_dotenv()
-    api_key = os.environ.get("SUPERMEMORY_API_KEY")
-
-    if not api_key:
-        raise HTTPException(status_code=500, detail="SUPERMEMORY_API_KEY not configured")
-
-    search_url = "https://api.supermemory.ai/v3/search"
+    client = _supermemory_client()
 
     # Clamp the limit to a reasonable range and oversample slightly so that,
     # after filtering to text-only results, we still have enough items.
@@ -346,109 +882,49 @@ async def recent_reels(limit: int = 10):
         "limit": safe_limit * 3,
     }
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-
     try:
-        response = requests.post(search_url, json=search_payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
-        candidates: list[tuple[datetime, SearchResult]] = []
-        seen_ids = set()
-
-        for item in data.get("results", []):
-            if item.get("type") != "text":
-                continue
-            doc_id = item.get("documentId")
-            if not doc_id or doc_id in seen_ids:
-                continue
-            seen_ids.add(doc_id)
-
-            metadata = item.get("metadata", {}) or {}
-            title = item.get("title") or metadata.get("topic") or "Untitled"
-            thumbnail_url = metadata.get("thumbnail_url") or metadata.get("image_url")
-            category = metadata.get("category")
-            summary = item.get("summary") or metadata.get("summary")
-            custom_id = metadata.get("customId")
-
-            # Parse extracted_at for sorting; fall back to minimal value.
-            extracted_str = metadata.get("extracted_at") or metadata.get("created_at") or ""
-            try:
-                extracted_ts = datetime.fromisoformat(extracted_str)
-            except Exception:
-                extracted_ts = datetime.min
-
-            # If we don't already have a thumbnail, try to find one by looking up
-            # an image document that shares the same customId (keyframes we stored
-            # alongside the text document).
-            if not thumbnail_url and custom_id:
-                try:
-                    img_search_payload = {
-                        "q": "images",
-                        "chunkThreshold": 0.5,
-                        "filters": {
-                            "AND": [
-                                {
-                                    "key": "customId",
-                                    "value": custom_id,
-                                    "negate": False,
-                                }
-                            ]
-                        },
-                        "limit": 1,
-                    }
-                    img_resp = requests.post(
-                        search_url, json=img_search_payload, headers=headers, timeout=30
-                    )
-                    img_resp.raise_for_status()
-                    img_data = img_resp.json()
-                    for img_item in img_data.get("results", []):
-                        if img_item.get("type") != "image":
-                            continue
-                        # Prefer direct URL from the image document if available.
-                        img_doc_id = img_item.get("documentId")
-                        if img_doc_id:
-                            try:
-                                doc_url = f"https://api.supermemory.ai/v3/documents/{img_doc_id}"
-                                doc_resp = requests.get(doc_url, headers=headers, timeout=30)
-                                doc_resp.raise_for_status()
-                                img_doc = doc_resp.json()
-                                thumbnail_url = (
-                                    img_doc.get("url")
-                                    or img_doc.get("metadata", {}).get("thumbnail_url")
-                                    or img_doc.get("metadata", {}).get("image_url")
-                                )
-                                if thumbnail_url:
-                                    break
-                            except requests.RequestException:
-                                continue
-                except requests.RequestException:
-                    # If thumbnail enrichment fails, we still return the text result.
-                    pass
-
-            result = SearchResult(
-                title=title,
-                thumbnail_url=thumbnail_url,
-                reel_id=doc_id,
-                document_id=doc_id,
-                score=item.get("score", 0.0),
-                category=category,
-                summary=summary,
-            )
-            candidates.append((extracted_ts, result))
+        data = await _sm_search(client, search_payload)
+    except (httpx.HTTPError, ValueError) as e:
+        raise HTTPException(status_code=500, detail=f"Recent reels lookup failed: {str(e)}")
 
-        # Sort by timestamp descending and trim to requested (clamped) limit.
-        candidates.sort(key=lambda pair: pair[0], reverse=True)
-        results = [r for _, r in candidates[:safe_limit]]
+    candidates = _unique_text_items(data.get("results", []))
 
-        return SearchResponse(results=results, total=len(results))
-    except requests.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Recent reels lookup failed: {str(e)}")
+    # Newest `safe_limit` items by save time (stable for ties, like a sort);
+    # only the kept items are turned into SearchResults.
+    newest = heapq.nlargest(
+        safe_limit, candidates, key=lambda item: _saved_at(item.get("metadata") or {})
+    )
+    kept = [_search_result(item) for item in newest]
+
+    # Only the reels actually returned need a cover image: look up missing
+    # thumbnails from keyframes stored alongside the text document.
+    await _fill_missing_thumbnails(
+        client,
+        [(result, custom_id) for result, custom_id in kept if not result.thumbnail_url and custom_id],
+    )
+    results = [result for result, _ in kept]
+
+    return SearchResponse(results=results, total=len(results))
 
-@router.get("/document/{document_id}")
+async def _load_keyframes(client: httpx.AsyncClient, custom_id: str) -> List[Dict[str, Any]]:
+    """
+    Keyframe entries for a customId: image search, then concurrent document
+    fetches for hits without a URL. Failures are logged and yield [].
+    """
+    try:
+        keyframe_results = await _search_keyframe_results(client, custom_id)
+        return await _fetch_keyframe_docs(client, keyframe_results)
+    except (httpx.HTTPError, ValueError) as e:
+        # Log error but don't fail the request
+        logger.warning("Failed to fetch keyframes: %s", e)
+        return []
+
+
+@router.get(
+    "/document/{document_id}",
+    response_model=DocumentDetailsResponse,
+    dependencies=[Depends(_lookup_slot)],
+)
 async def get_document_details(document_id: str, custom_id: Optional[str] = None):
     """
     Fetch document details by document ID and optionally retrieve associated keyframes.
@@ -456,108 +932,38 @@ async def get_document_details(document_id: str, custom_id: Optional[str] = None
     This is a two-step process:
     1. Fetch main document details from Supermemory
     2. If customId exists, search for all images with matching customId
+
+    When the caller already passes `custom_id`, both steps run concurrently.
+    Both go through the Supermemory read cache; `X-Cache` reports whether
+    the main document came from it. The body is encoded straight to JSON
+    bytes rather than re-validated through the response model.
     """
-    print(f"\n🚀 Starting document fetch for ID: {document_id}")
+    logger.debug("🚀 Starting document fetch for ID: %s", document_id)
+
+    client = _supermemory_client()
+
+    # A known customId lets the keyframe lookup (step 2) start right away
+    keyframes_task = (
+        asyncio.ensure_future(_load_keyframes(client, custom_id)) if custom_id else None
+    )
 
-    load_dotenv()
-    api_key = os.environ.get("SUPERMEMORY_API_KEY")
-    
-    if not api_key:
-        raise HTTPException(status_code=500, detail="SUPERMEMORY_API_KEY not configured")
-    
     # Step 1: Fetch main document
-    document_url = f"https://api.supermemory.ai/v3/documents/{document_id}"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    
     try:
-        resp = requests.get(document_url, headers=headers, timeout=30)
-        resp.raise_for_status()
-        main_doc = resp.json()
-    except requests.RequestException as e:
+        main_doc, cache_hit = await _sm_get_document(client, document_id)
+    except (httpx.HTTPError, ValueError) as e:
+        if keyframes_task is not None:
+            keyframes_task.cancel()
         raise HTTPException(status_code=500, detail=f"Failed to fetch document: {str(e)}")
     
-    # Extract customId from main document metadata if not provided
-    if not custom_id:
-        metadata = main_doc.get("metadata", {})
-        custom_id = metadata.get("customId")
+    # Step 2: keyframes for the customId given by the caller, else the one
+    # from the main document metadata
+    if keyframes_task is not None:
+        keyframe_images = await keyframes_task
+    else:
+        custom_id = main_doc.get("metadata", {}).get("customId")
+        keyframe_images = await _load_keyframes(client, custom_id) if custom_id else []
     
-    keyframe_images = []
-    # Step 2: Search for all images with matching customId
-    if custom_id:
-        search_url = "https://api.supermemory.ai/v3/search"
-        search_payload = {
-            "q": "images",
-            "chunkThreshold": 0.5,
-            "filters": {
-                "AND": [
-                    {
-                        "key": "customId",
-                        "value": custom_id,
-                        "negate": False
-                    }
-                ]
-            }
-        }
-        
-        try:
-            search_resp = requests.post(search_url, json=search_payload, headers=headers, timeout=30)
-            search_resp.raise_for_status()
-            search_results = search_resp.json()
-            
-            # Filter only image type results and fetch full document details
-            for item in search_results.get("results", []):
-                if item.get("type") == "image":
-                    # Get the documentId from the search result
-                    keyframe_doc_id = item.get("documentId")
-                    
-                    if keyframe_doc_id:
-                        try:
-                            # Call Document API for this keyframe
-                            keyframe_doc_url = f"https://api.supermemory.ai/v3/documents/{keyframe_doc_id}"
-                            keyframe_resp = requests.get(keyframe_doc_url, headers=headers, timeout=30)
-                            keyframe_resp.raise_for_status()
-                            keyframe_doc = keyframe_resp.json()
-                            
-                            # Extract URL from chunks
-                            image_url = None
-                            #chunks = keyframe_doc.get("chunks", [])
-                            #if chunks and len(chunks) > 0:
-                                # Get content from first chunk (usually contains the image URL)
-                            #    image_url = chunks[0].get("content", "")
-                            
-                            # If no URL in chunks, try content field directly
-                            #if not image_url:
-                            image_url = keyframe_doc.get("url", "")
-                            summary = keyframe_doc.get("summary", "")
-                            # Create enhanced keyframe object
-                            keyframe_obj = {
-                                "documentId": keyframe_doc_id,
-                                "url": image_url,
-                                "type": "image",
-                                "metadata": keyframe_doc.get("metadata", {}),
-                                "title": keyframe_doc.get("title", ""),
-                                "summary": summary,
-                                "timestamp": keyframe_doc.get("metadata", {}).get("extracted_at", ""),
-                                "frame_number": keyframe_doc.get("metadata", {}).get("frame_index", "")
-                            }
-                            
-                            keyframe_images.append(keyframe_obj)
-                            
-                        except requests.RequestException as e:
-                            # Log error but continue with other keyframes
-                            print(f"Warning: Failed to fetch keyframe document {keyframe_doc_id}: {str(e)}")
-                            continue
-                            
-        except requests.RequestException as e:
-            # Log error but don't fail the request
-            print(f"Warning: Failed to fetch keyframes: {str(e)}")
-    
-    print("main_doc:",main_doc)
-    print("keyframe_images:",keyframe_images)
-    print("custom_id:",custom_id)
+    logger.debug("📄 Document %s: %d keyframes (customId=%s)", document_id, len(keyframe_images), custom_id)
     
     # Cache the document in REELS dictionary so agent endpoints can access it
     # Parse content JSON to extract structured data
@@ -565,9 +971,9 @@ async def get_document_details(document_id: str, custom_id: Optional[str] = None
     try:
         content_str = main_doc.get("content", "{}")
         if content_str:
-            content_data = json.loads(content_str)
+            content_data = json_utils.loads(content_str)
     except (json.JSONDecodeError, Exception) as e:
-        print(f"Warning: Failed to parse document content: {e}")
+        logger.warning("Failed to parse document content: %s", e)
     
     # Build extraction object similar to regular reel format
     metadata = main_doc.get("metadata", {})
@@ -586,7 +992,7 @@ async def get_document_details(document_id: str, custom_id: Optional[str] = None
     }
     
     # Store in REELS dictionary with document_id as key
-    REELS[document_id] = {
+    reel = {
         #"reel_id": document_id,  # For backwards compatibility
         "document_id": document_id,
         "category": extraction["category"],
@@ -594,17 +1000,25 @@ async def get_document_details(document_id: str, custom_id: Optional[str] = None
         "model_name": "GenericExtraction",
         "extraction": extraction,
         "formatted_summary": None,
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
         "source_url": extraction["source_url"],
         "thumbnail_url": keyframe_images[0]["url"] if keyframe_images else metadata.get("thumbnail_url"),
         "errors": [],
         "_from_supermemory": True
     }
-    
-    return DocumentDetailsResponse(
-        document=main_doc,
-        keyframes=keyframe_images,
-        custom_id=custom_id
+    REELS[document_id] = reel
+    # Encode once here so GET /{reel_id} for this document serves the bytes.
+    _reel_json(document_id, reel)
+
+    body = json_utils.dumps_bytes({
+        "document": main_doc,
+        "keyframes": keyframe_images,
+        "custom_id": custom_id,
+    })
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Cache": "HIT" if cache_hit else "MISS"},
     )
 
 
@@ -615,29 +1029,22 @@ async def delete_document(document_id: str):
 
     Used by the browse view to permanently remove a saved reel.
     """
-    load_dotenv()
-    api_key = os.environ.get("SUPERMEMORY_API_KEY")
-
-    if not api_key:
-        raise HTTPException(status_code=500, detail="SUPERMEMORY_API_KEY not configured")
-
-    document_url = f"https://api.supermemory.ai/v3/documents/{document_id}"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    client = _supermemory_client()
 
     try:
-        resp = requests.delete(document_url, headers=headers, timeout=30)
-        if resp.status_code == 404:
+        await _sm_request(client, "DELETE", f"/documents/{document_id}")
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
             raise HTTPException(status_code=404, detail="Document not found in Supermemory")
-        resp.raise_for_status()
-    except requests.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete document: {str(e)}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete document: {str(e)}")
+    _sm_invalidate_document(document_id)
 
     # Best-effort removal from local cache if we used document_id as key.
     if document_id in REELS:
         REELS.pop(document_id, None)
+    _REEL_JSON.pop(document_id, None)
 
     return {"status": "deleted", "document_id": document_id}
 
@@ -649,9 +1056,10 @@ async def get_reel(reel_id: str):
     
     The response includes whether the extraction was generic and the
     model name used, so the UI can choose the correct detail view.
+    The body is encoded once per stored reel and reused for every read.
     """
     reel = REELS.get(reel_id)
     if not reel:
         raise HTTPException(status_code=404, detail="Unknown reel_id")
-    return reel
+    return Response(content=_reel_json(reel_id, reel), media_type="application/json")
     
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""
+Shared async HTTP access to the Supermemory v3 API for the API routers.
+
+One pooled `httpx.AsyncClient` serves every router (reels, agents), so
+document, search and keyframe requests reuse keep-alive connections (and
+HTTP/2 multiplexing when `h2` is installed) instead of opening a new TLS
+connection per call.
+
+Document and keyframe reads are memoized in a small in-process TTL cache,
+and concurrent identical reads share one upstream call.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from src.utils import json_utils
+
+logger = logging.getLogger("reel_extractor.api")
+
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+SUPERMEMORY_API_BASE = "https://api.supermemory.ai/v3"
+
+# Max keyframe documents fetched from Supermemory at the same time.
+KEYFRAME_FETCH_CONCURRENCY = 10
+
+_SM_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Longest Retry-After (seconds) honoured before retrying a throttled call.
+_SM_MAX_RETRY_AFTER = 5.0
+_SM_CLIENT: Optional[httpx.AsyncClient] = None
+
+# Read cache for documents (by id) and searches (by payload hash). Entries
+# are (expires_at, value), least recently used first.
+SM_CACHE_MAX_ENTRIES = 1024
+SM_DOCUMENT_CACHE_TTL_SECONDS = 300
+SM_SEARCH_CACHE_TTL_SECONDS = 60
+_SM_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# Upstream reads in flight, so identical concurrent requests await one call.
+_SM_INFLIGHT: Dict[Tuple[str, str], "asyncio.Future[Dict[str, Any]]"] = {}
+
+# Keyframe image search bodies; only the customId(s) and limit vary.
+# Keys are in sorted order so the body matches `json_utils.dumps(payload,
+# sort_keys=True)` and shares cache entries with the equivalent dict.
+_IMAGES_QUERY_TEMPLATE = '{"chunkThreshold":0.5,"filters":{"%s":[%s]}%s,"q":"images"}'
+_CUSTOM_ID_FILTER_TEMPLATE = '{"key":"customId","negate":false,"value":%s}'
+
+
+def _get_sm_client(api_key: str) -> httpx.AsyncClient:
+    """
+    Shared async client for Supermemory calls, created on first use.
+
+    Keep-alive pooling (and HTTP/2 multiplexing when `h2` is installed)
+    lets a document plus its K keyframes share one connection instead of
+    paying K + 2 handshakes. Closed by `close_sm_client()` on shutdown.
+    """
+    global _SM_CLIENT
+    if _SM_CLIENT is None or _SM_CLIENT.is_closed:
+        _SM_CLIENT = httpx.AsyncClient(
+            base_url=SUPERMEMORY_API_BASE,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            timeout=30.0,
+            # Connection-level retries; 429/5xx retries live in `_sm_request`.
+            transport=httpx.AsyncHTTPTransport(
+                retries=2,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            ),
+        )
+    return _SM_CLIENT
+
+
+def open_sm_client(api_key: str) -> None:
+    """Open the shared Supermemory client ahead of the first request."""
+    _get_sm_client(api_key)
+
+
+async def close_sm_client() -> None:
+    """Close the shared Supermemory client, if one was opened."""
+    global _SM_CLIENT
+    if _SM_CLIENT is not None:
+        await _SM_CLIENT.aclose()
+        _SM_CLIENT = None
+
+
+async def _sm_request(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a Supermemory request, retrying up to three times on 429/5xx.
+
+    Backs off 0.2s, 0.4s, 0.8s, or the server's Retry-After (capped at
+    `_SM_MAX_RETRY_AFTER`) when one is given.
+    """
+    for attempt in range(4):
+        resp = await client.request(method, url, **kwargs)
+        if resp.status_code not in _SM_RETRY_STATUSES or attempt == 3:
+            break
+        delay = 0.2 * 2 ** attempt
+        try:
+            delay = min(max(float(resp.headers["retry-after"]), 0.0), _SM_MAX_RETRY_AFTER)
+        except (KeyError, ValueError):
+            pass
+        await asyncio.sleep(delay)
+    resp.raise_for_status()
+    return resp
+
+
+async def _sm_cache_fill(
+    key: Tuple[str, str], ttl: float, fetch: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Run `fetch` and store its result under `key` for `ttl` seconds."""
+    value = await fetch()
+    _SM_CACHE[key] = (time.monotonic() + ttl, value)
+    _SM_CACHE.move_to_end(key)
+    while len(_SM_CACHE) > SM_CACHE_MAX_ENTRIES:
+        _SM_CACHE.popitem(last=False)
+    return value
+
+
+async def _sm_cached(
+    key: Tuple[str, str], ttl: float, fetch: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Return (value, cache_hit) for `key`, calling `fetch` only on a miss.
+
+    Concurrent misses for the same key share one `fetch`; only the caller
+    that started it reports a miss. Failures are not cached. Cached values
+    are shared, so callers must not mutate them.
+    """
+    entry = _SM_CACHE.get(key)
+    if entry is not None:
+        expires_at, value = entry
+        if time.monotonic() < expires_at:
+            _SM_CACHE.move_to_end(key)
+            return value, True
+        _SM_CACHE.pop(key, None)
+
+    task = _SM_INFLIGHT.get(key)
+    hit = task is not None
+    if task is None:
+        task = asyncio.ensure_future(_sm_cache_fill(key, ttl, fetch))
+        _SM_INFLIGHT[key] = task
+
+        def forget(done: "asyncio.Future[Dict[str, Any]]") -> None:
+            if _SM_INFLIGHT.get(key) is done:
+                del _SM_INFLIGHT[key]
+
+        task.add_done_callback(forget)
+    # Shielded so one cancelled waiter does not cancel the shared call.
+    return await asyncio.shield(task), hit
+
+
+def _sm_invalidate_document(document_id: str) -> None:
+    """Drop a document and every cached search (which may list it)."""
+    _SM_CACHE.pop(("document", document_id), None)
+    _SM_CACHE.pop(("keyframe", document_id), None)
+    for key in [key for key in _SM_CACHE if key[0] == "search"]:
+        del _SM_CACHE[key]
+
+
+def cache_size() -> int:
+    """Number of entries in the Supermemory response cache."""
+    return len(_SM_CACHE)
+
+
+async def _sm_get_document(client: httpx.AsyncClient, document_id: str) -> Tuple[Dict[str, Any], bool]:
+    """Fetch a document by id, cached; returns (document, cache_hit)."""
+
+    async def fetch() -> Dict[str, Any]:
+        resp = await _sm_request(client, "GET", f"/documents/{document_id}")
+        return json_utils.loads(resp.content)
+
+    return await _sm_cached(("document", document_id), SM_DOCUMENT_CACHE_TTL_SECONDS, fetch)
+
+
+# Fields of an image document that keyframe and thumbnail lookups read.
+_KEYFRAME_FIELDS = ("url", "title", "summary", "metadata")
+
+
+async def _sm_get_keyframe(client: httpx.AsyncClient, document_id: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Fetch an image document trimmed to `_KEYFRAME_FIELDS`, cached; returns
+    (document, cache_hit).
+
+    Image documents carry content and chunks nobody reads here; caching only
+    the needed fields keeps them out of `_SM_CACHE`.
+    """
+
+    async def fetch() -> Dict[str, Any]:
+        resp = await _sm_request(client, "GET", f"/documents/{document_id}")
+        doc = json_utils.loads(resp.content)
+        return {field: doc[field] for field in _KEYFRAME_FIELDS if field in doc}
+
+    return await _sm_cached(("keyframe", document_id), SM_DOCUMENT_CACHE_TTL_SECONDS, fetch)
+
+
+async def _sm_search(client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST a search payload and return the decoded response."""
+    resp = await _sm_request(client, "POST", "/search", content=json_utils.dumps(payload))
+    return json_utils.loads(resp.content)
+
+
+async def _sm_search_cached(
+    client: httpx.AsyncClient,
+    payload: Union[Dict[str, Any], str],
+    ttl: float = SM_SEARCH_CACHE_TTL_SECONDS,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    `_sm_search` through the read cache; returns (response, cache_hit).
+
+    `payload` may also be a body already encoded with sorted keys.
+    """
+    body = payload if isinstance(payload, str) else json_utils.dumps(payload, sort_keys=True)
+    key = ("search", hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest())
+
+    async def fetch() -> Dict[str, Any]:
+        resp = await _sm_request(client, "POST", "/search", content=body)
+        return json_utils.loads(resp.content)
+
+    return await _sm_cached(key, ttl, fetch)
+
+
+def _images_query(operator: str, custom_ids: List[str], limit: Optional[int]) -> str:
+    """Fill `_IMAGES_QUERY_TEMPLATE`; only the customIds are JSON-encoded."""
+    filters = ",".join(
+        _CUSTOM_ID_FILTER_TEMPLATE % json_utils.dumps(custom_id) for custom_id in custom_ids
+    )
+    limit_field = f',"limit":{int(limit)}' if limit is not None else ""
+    return _IMAGES_QUERY_TEMPLATE % (operator, filters, limit_field)
+
+
+def _custom_id_images_query(custom_id: str, limit: Optional[int] = None) -> str:
+    """Encoded search body for the keyframe images stored under a reel's customId."""
+    return _images_query("AND", [custom_id], limit)
+
+
+def _custom_ids_images_query(custom_ids: List[str], limit: int) -> str:
+    """Encoded search body for keyframe images stored under any of several customIds."""
+    return _images_query("OR", custom_ids, limit)
+
+
+async def _search_keyframe_results(
+    client: httpx.AsyncClient, custom_id: str, limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Image search results stored under `custom_id`, in search order."""
+    # Keyframes are written together with their reel, so the listing can
+    # live as long as the documents themselves.
+    search_results, _ = await _sm_search_cached(
+        client, _custom_id_images_query(custom_id, limit), SM_DOCUMENT_CACHE_TTL_SECONDS
+    )
+    return [
+        item
+        for item in search_results.get("results", [])
+        if item.get("type") == "image" and item.get("documentId")
+    ]
+
+
+def _result_url(item: Dict[str, Any]) -> Optional[str]:
+    """Image URL carried by a search result itself, if any."""
+    content = item.get("content")
+    return item.get("url") or (content.get("url") if isinstance(content, dict) else None)
+
+
+def _keyframe_record(keyframe_doc_id: str, doc: Dict[str, Any], url: str) -> Dict[str, Any]:
+    """Keyframe entry returned to the UI, from a search result or a document."""
+    metadata = doc.get("metadata") or {}
+    return {
+        "documentId": keyframe_doc_id,
+        "url": url,
+        "type": "image",
+        "metadata": metadata,
+        "title": doc.get("title", ""),
+        "summary": doc.get("summary", ""),
+        "timestamp": metadata.get("extracted_at", ""),
+        "frame_number": metadata.get("frame_index", "")
+    }
+
+
+async def _fetch_keyframe_doc(client: httpx.AsyncClient, keyframe_doc_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch one keyframe document; returns None if the request fails."""
+    try:
+        keyframe_doc, _ = await _sm_get_keyframe(client, keyframe_doc_id)
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("Failed to fetch keyframe document %s: %s", keyframe_doc_id, e)
+        return None
+    return _keyframe_record(keyframe_doc_id, keyframe_doc, keyframe_doc.get("url", ""))
+
+
+async def _fetch_keyframe_docs(client: httpx.AsyncClient, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build keyframe entries for image search results, keeping search order
+    and skipping any that fail.
+
+    Results that already carry their URL are used as-is; only the rest
+    cost a document GET (at most KEYFRAME_FETCH_CONCURRENCY in flight).
+    """
+    limit = asyncio.Semaphore(KEYFRAME_FETCH_CONCURRENCY)
+
+    async def resolve(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        keyframe_doc_id = item["documentId"]
+        url = _result_url(item)
+        if url:
+            return _keyframe_record(keyframe_doc_id, item, url)
+        async with limit:
+            return await _fetch_keyframe_doc(client, keyframe_doc_id)
+
+    fetched = await asyncio.gather(*(resolve(item) for item in results))
+    return [kf for kf in fetched if kf is not None]
@@ -5,6 +5,7 @@ import json
 from pathlib import Path
 from typing import Dict, Any, Optional, Literal, Tuple
 import google.generativeai as genai
+from src.utils import json_utils
 from src.utils.config import Config
 from src.models import (
     WorkoutRoutine,
@@ -57,6 +58,34 @@ class GeminiAnalyzer:
         self.model_name = self.model._model_name if hasattr(self.model, '_model_name') else model_names[0]
         print(f"🤖 Using Gemini model: {self.model_name}")
     
+    @staticmethod
+    def _keyframe_parts(keyframes: Optional[list], limit: int) -> list:
+        """
+        Build inline image parts for the first `limit` keyframes.
+        
+        Frames are sent as inline bytes inside the single generate_content
+        request instead of going through `genai.upload_file` one by one,
+        which cost an extra round-trip per keyframe before every call.
+        
+        Args:
+            keyframes: List of keyframe image paths (optional)
+            limit: Maximum number of keyframes to include
+        
+        Returns:
+            List of content parts (a short ordering note plus the images)
+        """
+        parts = []
+        for keyframe_path in (keyframes or [])[:limit]:
+            path = Path(keyframe_path)
+            if not path.exists():
+                continue
+            mime_type = "image/png" if path.suffix.lower() == ".png" else "image/jpeg"
+            parts.append({"mime_type": mime_type, "data": path.read_bytes()})
+        
+        if parts:
+            parts.insert(0, "\nThe following images are keyframes from the video, in chronological order:")
+        return parts
+    
     def detect_category(
         self, 
         video_path: Optional[Path] = None,
@@ -92,11 +121,8 @@ class GeminiAnalyzer:
             # performance. Keyframes + optional transcript provide enough
             # signal for high-quality category detection.
             
-            # Add keyframes if provided
-            if keyframes:
-                for keyframe_path in keyframes[:5]:  # Limit to first 5 keyframes
-                    if Path(keyframe_path).exists():
-                        content_parts.append(genai.upload_file(path=str(keyframe_path)))
+            # Add keyframes if provided (limit to first 5 keyframes)
+            content_parts.extend(self._keyframe_parts(keyframes, limit=5))
             
             # Add transcript if provided
             if transcript:
@@ -551,11 +577,8 @@ class GeminiAnalyzer:
             # keyframe images plus the transcript (when available), which is
             # usually sufficient for high-quality extraction.
             
-            # Add keyframes if provided
-            if keyframes:
-                for keyframe_path in keyframes[:10]:  # Limit to first 10 keyframes
-                    if Path(keyframe_path).exists():
-                        content_parts.append(genai.upload_file(path=str(keyframe_path)))
+            # Add keyframes if provided (limit to first 10 keyframes)
+            content_parts.extend(self._keyframe_parts(keyframes, limit=10))
             
             # Add transcript if provided
             if transcript:
@@ -582,7 +605,7 @@ class GeminiAnalyzer:
             elif response_text.startswith("```"):
                 response_text = response_text.split("```")[1].split("```")[0].strip()
             
-            gemini_data = json.loads(response_text)
+            gemini_data = json_utils.loads(response_text)
 
             # Normalize top-level list responses from Gemini into an object so that
             # the rest of the logic (which expects a dict) can operate safely.
@@ -1,7 +1,10 @@
-from typing import Optional
+import functools
+import threading
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 
 from fastapi import HTTPException
 
+from src.utils import json_utils
 from src.utils.config import Config
 
 try:
@@ -10,13 +13,122 @@ except ImportError:  # pragma: no cover - handled at runtime via HTTP error
     genai = None  # type: ignore
 
 
-def _get_gemini_model(allow_pro: bool = True):
+PRO_FIRST_MODELS = (
+    "models/gemini-2.5-pro",
+    "models/gemini-2.5-flash",
+    "models/gemini-2.0-flash-001",
+    "models/gemini-2.0-flash",
+)
+FLASH_ONLY_MODELS = (
+    "models/gemini-2.5-flash",
+    "models/gemini-2.0-flash-001",
+    "models/gemini-2.0-flash",
+)
+
+# Model instances are cheap wrappers but rebuilding them (and re-running
+# `genai.configure`) on every request is wasted work, so they are reused per
+# (allow_pro, generation_config, system_instruction) combination.
+MODEL_CACHE_MAX_ENTRIES = 64
+_MODEL_CACHE: Dict[Tuple[bool, str, Optional[str]], Any] = {}
+# Serialized form of each generation_config object seen, by id; the object is
+# kept alongside so ids cannot be reused while an entry exists.
+_CONFIG_KEYS: Dict[int, Tuple[Any, str]] = {}
+_CONFIGURE_LOCK = threading.Lock()
+_configured = False
+# Model name per allow_pro, filled only from a successful `list_models`.
+_RESOLVED_MODELS: Dict[bool, str] = {}
+
+
+def _config_key(generation_config: Optional[Dict[str, Any]]) -> str:
+    """Stable cache key for a generation config, serialized once per object."""
+    entry = _CONFIG_KEYS.get(id(generation_config))
+    if entry is not None and entry[0] is generation_config:
+        return entry[1]
+    key = json_utils.dumps(generation_config, sort_keys=True)
+    if len(_CONFIG_KEYS) >= MODEL_CACHE_MAX_ENTRIES:
+        _CONFIG_KEYS.clear()
+    _CONFIG_KEYS[id(generation_config)] = (generation_config, key)
+    return key
+
+
+def _ensure_configured() -> None:
+    global _configured
+    if _configured:
+        return
+    with _CONFIGURE_LOCK:
+        if not _configured:
+            genai.configure(api_key=Config.GEMINI_API_KEY)
+            _configured = True
+
+
+@functools.lru_cache(maxsize=1)
+def _available_model_names() -> FrozenSet[str]:
+    """Model names visible to this API key; one `list_models` call per process."""
+    return frozenset(m.name for m in genai.list_models())
+
+
+def _resolve_gemini_model(allow_pro: bool) -> str:
+    """
+    Pick the preferred model name available to this API key.
+
+    If listing models fails we use the first candidate and let the real
+    request surface errors. Only names picked from a successful listing are
+    remembered, so a transient failure is retried on the next call.
+    """
+    resolved = _RESOLVED_MODELS.get(allow_pro)
+    if resolved is not None:
+        return resolved
+
+    model_names = PRO_FIRST_MODELS if allow_pro else FLASH_ONLY_MODELS
+    try:
+        available = _available_model_names()
+    except Exception as exc:  # pragma: no cover - dependent on remote API
+        print(f"⚠️  Could not list Gemini models ({exc}); using {model_names[0]}")
+        return model_names[0]
+
+    for name in model_names:
+        if name in available:
+            _RESOLVED_MODELS[allow_pro] = name
+            return name
+    raise HTTPException(
+        status_code=500,
+        detail=(
+            "Unable to initialize any Gemini model. "
+            f"Tried: {', '.join(model_names)}."
+        ),
+    )
+
+
+def warm_up_gemini_models() -> None:
+    """
+    Resolve the Pro and flash model names ahead of the first request.
+
+    Blocking (one `list_models` round-trip); meant to run in a worker thread at
+    startup. Does nothing if Gemini is not configured.
+    """
+    if not Config.GEMINI_API_KEY or genai is None:
+        return
+    _ensure_configured()
+    try:
+        for allow_pro in (True, False):
+            _resolve_gemini_model(allow_pro)
+    except HTTPException as exc:
+        print(f"⚠️  Gemini warm-up failed: {exc.detail}")
+
+
+def _get_gemini_model(
+    allow_pro: bool = True,
+    generation_config: Optional[Dict[str, Any]] = None,
+    system_instruction: Optional[str] = None,
+):
     """
     Initialize a Gemini model suitable for agentic enhancement and analysis.
 
     When allow_pro=True we prefer higher quality (2.5 Pro first).
     When allow_pro=False we skip Pro and fall back to flash variants,
     which have a more generous free-tier rate limit.
+    `generation_config` (e.g. a JSON response schema) and `system_instruction`
+    are applied to every request made with the returned model.
     """
     if not Config.GEMINI_API_KEY:
         raise HTTPException(
@@ -32,44 +144,20 @@ def _get_gemini_model(allow_pro: bool = True):
             ),
         )
 
-    genai.configure(api_key=Config.GEMINI_API_KEY)
-
-    pro_first = [
-        "models/gemini-2.5-pro",
-        "models/gemini-2.5-flash",
-        "models/gemini-2.0-flash-001",
-        "models/gemini-2.0-flash",
-    ]
-    flash_only = [
-        "models/gemini-2.5-flash",
-        "models/gemini-2.0-flash-001",
-        "models/gemini-2.0-flash",
-    ]
-    model_names = pro_first if allow_pro else flash_only
-
-    model = None
-    last_error: Optional[Exception] = None
-
-    for name in model_names:
-        try:
-            candidate = genai.GenerativeModel(name)
-            # Simple smoke test – a tiny prompt so we fail fast if unsupported.
-            candidate.generate_content("ping")
-            model = candidate
-            break
-        except Exception as exc:  # pragma: no cover - dependent on remote API
-            last_error = exc
-            continue
-
-    if model is None:
-        raise HTTPException(
-            status_code=500,
-            detail=(
-                "Unable to initialize any Gemini model. "
-                f"Tried: {', '.join(model_names)}. Last error: {last_error}"
-            ),
-        )
+    key = (allow_pro, _config_key(generation_config), system_instruction)
+    model = _MODEL_CACHE.get(key)
+    if model is not None:
+        return model
 
+    _ensure_configured()
+    model = genai.GenerativeModel(
+        _resolve_gemini_model(allow_pro),
+        generation_config=generation_config,
+        system_instruction=system_instruction,
+    )
+    if allow_pro not in _RESOLVED_MODELS:
+        return model  # fallback name; resolve again next time
+    if len(_MODEL_CACHE) >= MODEL_CACHE_MAX_ENTRIES:
+        _MODEL_CACHE.pop(next(iter(_MODEL_CACHE)), None)
+    _MODEL_CACHE[key] = model
     return model
-
-
@@ -10,6 +10,8 @@ https://developers.facebook.com/docs/instagram-api/
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from dotenv import load_dotenv
@@ -17,6 +19,9 @@ import re
 
 load_dotenv()
 
+# Reel / post / IGTV URLs all carry the media shortcode after the type segment.
+_SHORTCODE_RE = re.compile(r'instagram\.com/(?:reel|p|tv)/([A-Za-z0-9_-]+)')
+
 
 class InstagramAPIClient:
     """Client for interacting with Instagram Graph API"""
@@ -33,9 +38,25 @@ class InstagramAPIClient:
         self.base_url = "https://graph.instagram.com"
         self.graph_api_version = "v18.0"
         
+        # One pooled session for every Graph API call so keep-alive
+        # connections are reused; transient 5xx responses are retried.
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=16,
+                max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+            ),
+        )
+        
         if not self.access_token:
             print("⚠️  Warning: INSTAGRAM_ACCESS_TOKEN not set. API calls will fail.")
     
+    def close(self) -> None:
+        """Close the pooled HTTP session."""
+        self.session.close()
+    
     def extract_media_id_from_url(self, instagram_url: str) -> Optional[str]:
         """
         Extract media ID from Instagram URL
@@ -50,18 +71,8 @@ class InstagramAPIClient:
             https://www.instagram.com/reel/ABC123/ -> ABC123
             https://www.instagram.com/p/XYZ789/ -> XYZ789
         """
-        patterns = [
-            r'instagram\.com/reel/([A-Za-z0-9_-]+)',
-            r'instagram\.com/p/([A-Za-z0-9_-]+)',
-            r'instagram\.com/tv/([A-Za-z0-9_-]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, instagram_url)
-            if match:
-                return match.group(1)
-        
-        return None
+        match = _SHORTCODE_RE.search(instagram_url)
+        return match.group(1) if match else None
     
     def get_media_id_from_shortcode(self, shortcode: str) -> Optional[str]:
         """
@@ -127,7 +138,7 @@ class InstagramAPIClient:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
             
@@ -176,7 +187,7 @@ class InstagramAPIClient:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
             
@@ -222,7 +233,7 @@ class InstagramAPIClient:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
             
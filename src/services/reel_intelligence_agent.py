@@ -11,7 +11,6 @@ from typing import TypedDict, Annotated, Sequence, Optional, Dict, Any, List
 from datetime import datetime
 import operator
 import json
-import re
 from urllib.parse import quote_plus
 
 from langgraph.graph import StateGraph, END
@@ -20,9 +19,25 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 
 from src.services.gemini_model_helper import _get_gemini_model
+from src.utils import json_utils
 
 load_dotenv()
 
+# Structured-output schema for the content understanding call; Gemini returns
+# exactly this JSON object, so no prose/fence stripping is needed.
+CONTENT_UNDERSTANDING_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "entities": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "suggested_actions": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["entities", "suggested_actions"],
+}
+CONTENT_UNDERSTANDING_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": CONTENT_UNDERSTANDING_SCHEMA,
+}
+
 # Initialize Gemini (kept for backwards compatibility; most calls now use _get_gemini_model)
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 llm = ChatGoogleGenerativeAI(
@@ -80,7 +95,7 @@ def reel_context_builder_agent(state: ReelIntelligenceState) -> ReelIntelligence
         # Parse the content (which is JSON string of the extraction)
         content_str = main_doc.get("content", "{}")
         try:
-            content_data = json.loads(content_str) if isinstance(content_str, str) else content_str
+            content_data = json_utils.loads(content_str) if isinstance(content_str, str) else content_str
         except json.JSONDecodeError:
             content_data = {}
         
@@ -172,8 +187,6 @@ def _call_gemini_for_content_understanding(reel_context: Dict[str, Any]) -> Dict
 
     Returns a dict with keys: content_type, entities, topics, summary, sentiment, suggested_actions.
     """
-    import json as _json
-
     system_prompt = (
         "You are an assistant that analyzes short social video content.\n"
         "You receive structured JSON context for an Instagram reel and must "
@@ -183,51 +196,41 @@ def _call_gemini_for_content_understanding(reel_context: Dict[str, Any]) -> Dict
 
     user_prompt = (
         "Here is the structured reel_context JSON:\n"
-        f"{reel_context}\n\n"
-        "Respond strictly as compact JSON with the following shape:\n"
-        "{\n"
-        #'  "content_type": "workout | recipe | travel | product_review | educational | entertainment | other",\n'
-        '  "entities": ["list of key entities such as people, brands, products, or places"],\n'
-        #'  "topics": ["list of high-level topics/themes"],\n'
-        #'  "summary": "2-3 sentence plain-text summary of the reel",\n'
-        #'  "sentiment": "positive | neutral | negative",\n'
-        '  "suggested_actions": [\n'
-        '    "short, user-facing action labels such as \\"Open in maps\\", \\"Search products\\", \\"Save recipe\\", etc."\n'
-        "  ]\n"
-        "}\n"
-        "Do not add any extra keys, comments, or explanations outside this JSON object."
+        f"{json_utils.dumps(reel_context)}\n\n"
+        "entities: key people, brands, products, or places.\n"
+        "suggested_actions: short, user-facing action labels such as "
+        '"Open in maps", "Search products", "Save recipe".'
     )
 
     try:
         # Prefer Pro model when available; fall back to flash if we hit quota limits.
-        model = _get_gemini_model(allow_pro=True)
-        resp = model.generate_content([system_prompt, user_prompt])
+        model = _get_gemini_model(
+            allow_pro=True,
+            generation_config=CONTENT_UNDERSTANDING_CONFIG,
+            system_instruction=system_prompt,
+        )
+        resp = model.generate_content(user_prompt)
     except Exception as exc:  # pragma: no cover - depends on remote API
         msg = str(exc)
         if "ResourceExhausted" in msg or "quota" in msg or "429" in msg:
-            model = _get_gemini_model(allow_pro=False)
-            resp = model.generate_content([system_prompt, user_prompt])
+            model = _get_gemini_model(
+                allow_pro=False,
+                generation_config=CONTENT_UNDERSTANDING_CONFIG,
+                system_instruction=system_prompt,
+            )
+            resp = model.generate_content(user_prompt)
         else:
             raise
 
     text = resp.text or ""
 
-    # Try to locate the JSON object within the model response.
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if not match:
-        # Fallback: treat whole response as summary only.
-        return {
-            "content_type": reel_context.get("category", "unknown"),
-            "entities": [],
-            "topics": [],
-            "summary": text[:400],
-            "sentiment": "neutral",
-        }
-
     try:
-        data = _json.loads(match.group(0))
-    except _json.JSONDecodeError:
-        # Fallback if JSON parsing fails
+        data = json_utils.loads(text)
+    except json.JSONDecodeError:
+        data = None
+
+    if not isinstance(data, dict):
+        # Fallback: treat whole response as summary only.
         return {
             "content_type": reel_context.get("category", "unknown"),
             "entities": [],
@@ -534,7 +537,8 @@ def generate_reel_intelligence(
     document_id: str,
     custom_id: str,
     main_document: Dict[str, Any],
-    keyframe_images: List[Dict[str, Any]]
+    keyframe_images: List[Dict[str, Any]],
+    content_dict: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Main function to generate reel intelligence using the agent flow
@@ -544,6 +548,8 @@ def generate_reel_intelligence(
         custom_id: The custom ID linking document and keyframes
         main_document: The main document data
         keyframe_images: List of keyframe image documents
+        content_dict: Already-parsed extraction content; used as the
+            document content instead of decoding main_document["content"]
     
     Returns:
         Reel Intelligence Object with all enriched data
@@ -552,6 +558,9 @@ def generate_reel_intelligence(
     print("🚀 Starting Reel Intelligence Agent Flow")
     print("="*80 + "\n")
     
+    if content_dict is not None:
+        main_document = {**main_document, "content": content_dict}
+    
     # Initialize state
     initial_state = {
         #"document_id": document_id,
@@ -2,6 +2,8 @@
 Supermemeory.ai integration service
 """
 from typing import Dict, Any, Optional, Tuple
+import httpx
+from src.utils import json_utils
 from src.utils.config import Config
 from src.models.base import BaseExtraction
 
@@ -10,7 +12,6 @@ try:
     SUPERMEMORY_AVAILABLE = True
 except ImportError:
     SUPERMEMORY_AVAILABLE = False
-    import httpx
 
 
 class SupermemeoryClient:
@@ -29,6 +30,12 @@ class SupermemeoryClient:
         self.api_key = Config.SUPERMEMEORY_API_KEY
         self.base_url = Config.SUPERMEMEORY_BASE_URL.rstrip('/')
         self.timeout = 30.0
+        # One pooled HTTP client for every raw API call (keyframe uploads,
+        # fallbacks) so keep-alive connections are reused across requests.
+        self.http = httpx.Client(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
         
         # Use supermemory package if available
         if SUPERMEMORY_AVAILABLE:
@@ -40,6 +47,10 @@ class SupermemeoryClient:
         else:
             self.use_package = False
     
+    def close(self) -> None:
+        """Close the pooled HTTP client."""
+        self.http.close()
+    
     def _get_headers(self) -> Dict[str, str]:
         """Get HTTP headers for API requests"""
         return {
@@ -64,10 +75,8 @@ class SupermemeoryClient:
         """
         try:
             # Prepare payload
-            import json
             import base64
             import hashlib
-            import httpx
             keyframes = getattr(extraction, "keyframes", None)
             extraction.keyframes = []
             _dump = extraction.model_dump(mode="json") # remove the non emebddding fields
@@ -78,7 +87,7 @@ class SupermemeoryClient:
                 #"title": extraction.title,
                 # Remove 'extracted_at' and 'confidence_score' before serializing to JSON content
                 
-                "content": json.dumps(_dump),
+                "content": json_utils.dumps(_dump),
                 "container_tag": extraction.category,
                 #"container_tags": self._generate_tags(extraction),
                 "metadata": {
@@ -128,27 +137,26 @@ class SupermemeoryClient:
                             # Prepare multipart form data
                             url = f"{self.base_url}/v3/documents/file"
                             
-                            with httpx.Client(timeout=self.timeout) as client:
-                                with open(frame_path, "rb") as f:
-                                    files = {
-                                        "file": (frame_path.name if hasattr(frame_path, 'name') else f"keyframe_{idx}.jpg", f, mime_type)
-                                    }
-                                    
-                                    data = {
-                                        "container_tag": json.dumps([extraction.category]),
-                                        "fileType": "image",
-                                        "mimeType": mime_type,
-                                        "metadata": json.dumps(kf_metadata)
-                                    }
-                                    
-                                    response = client.post(
-                                        url,
-                                        headers={"Authorization": f"Bearer {self.api_key}"},
-                                        files=files,
-                                        data=data
-                                    )
-                                    response.raise_for_status()
-                                    uploaded_count += 1
+                            with open(frame_path, "rb") as f:
+                                files = {
+                                    "file": (frame_path.name if hasattr(frame_path, 'name') else f"keyframe_{idx}.jpg", f, mime_type)
+                                }
+                                
+                                data = {
+                                    "container_tag": json_utils.dumps([extraction.category]),
+                                    "fileType": "image",
+                                    "mimeType": mime_type,
+                                    "metadata": json_utils.dumps(kf_metadata)
+                                }
+                                
+                                response = self.http.post(
+                                    url,
+                                    headers={"Authorization": f"Bearer {self.api_key}"},
+                                    files=files,
+                                    data=data
+                                )
+                                response.raise_for_status()
+                                uploaded_count += 1
                             
                         except Exception as e:
                             # Skip individual keyframes that fail to upload
@@ -184,10 +192,9 @@ class SupermemeoryClient:
         """
         try:
             # Prepare payload
-            import json
             payload = {
                 #"title": extraction.title,
-                "content": json.dumps(extraction.model_dump(mode="json")),
+                "content": json_utils.dumps(extraction.model_dump(mode="json")),
                 "container_tag": extraction.category,
                 #"container_tags": self._generate_tags(extraction),
                 "metadata": {
@@ -199,17 +206,15 @@ class SupermemeoryClient:
                 }
             }
 
-            import httpx
             url = f"{self.base_url}/v3/documents"
             
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    url,
-                    headers=self._get_headers(),
-                    json=payload
-                )
-                response.raise_for_status()
-                return response.json(), None
+            response = self.http.post(
+                url,
+                headers=self._get_headers(),
+                json=payload
+            )
+            response.raise_for_status()
+            return json_utils.loads(response.content), None
                 
         except Exception as e:
             return None, f"Error storing extraction: {str(e)}"
@@ -273,7 +278,6 @@ class SupermemeoryClient:
                     return None, f"Supermemory package error: {str(e)}"
             else:
                 # Fallback to HTTP
-                import httpx
                 url = f"{self.base_url}/v1/search"
                 
                 payload = {
@@ -281,14 +285,13 @@ class SupermemeoryClient:
                     "limit": limit
                 }
                 
-                with httpx.Client(timeout=self.timeout) as client:
-                    response = client.post(
-                        url,
-                        headers=self._get_headers(),
-                        json=payload
-                    )
-                    response.raise_for_status()
-                    return response.json(), None
+                response = self.http.post(
+                    url,
+                    headers=self._get_headers(),
+                    json=payload
+                )
+                response.raise_for_status()
+                return json_utils.loads(response.content), None
                 
         except Exception as e:
             return None, f"Error searching memories: {str(e)}"
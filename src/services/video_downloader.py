@@ -4,7 +4,7 @@ Video download and preprocessing service
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from src.utils.config import Config
 from src.utils.file_utils import (
     generate_unique_filename,
@@ -24,7 +24,9 @@ class VideoDownloader:
         """Initialize the video downloader"""
         Config.ensure_temp_storage()
     
-    def download_from_url(self, url: str) -> Tuple[Optional[Path], Optional[str]]:
+    def download_from_url(
+        self, url: str, temp_files: Optional[List[Path]] = None
+    ) -> Tuple[Optional[Path], Optional[str]]:
         """
         Download video from URL (Instagram, TikTok, YouTube Shorts, etc.).
         
@@ -32,6 +34,9 @@ class VideoDownloader:
         
         Args:
             url: URL of the video to download
+            temp_files: Optional list that receives extra temp files created
+                for this download (e.g. its private cookie copy) so the
+                caller can clean them up
         
         Returns:
             Tuple of (file_path, error_message)
@@ -50,6 +55,9 @@ class VideoDownloader:
                 'quiet': False,  # Show progress
                 'no_warnings': False,
                 'extract_flat': False,
+                # Start with 1 MiB read/write blocks instead of yt-dlp's 1 KiB
+                # default so the file is written in far fewer syscalls.
+                'buffersize': 1024 * 1024,
                 # Add headers to appear more like a real browser (helps with rate limits)
                 'http_headers': {
                     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -69,9 +77,14 @@ class VideoDownloader:
             if render_secrets.exists() and render_secrets.is_file():
                 # Render Secret Files are read-only, so copy to temp location
                 # yt-dlp tries to update cookies, which fails on read-only mounts
-                import shutil
-                temp_cookies = get_temp_file_path('instagram_cookies.txt')
+                # Each download gets its own copy so parallel extractions
+                # never share (or delete) one another's cookie file
+                temp_cookies = get_temp_file_path(
+                    f"instagram_cookies_{generate_unique_filename('cookies', '.txt')}"
+                )
                 shutil.copy2(render_secrets, temp_cookies)
+                if temp_files is not None:
+                    temp_files.append(temp_cookies)
                 cookies_file = temp_cookies
                 print(f"🍪 Using Instagram authentication from Render Secret Files (copied to temp)")
             # Try local file (development)
@@ -172,19 +185,25 @@ class VideoDownloader:
         except Exception as e:
             return None, f"Error copying file: {str(e)}"
     
-    def process(self, input_source: str, source_type: str = "file") -> Tuple[Optional[Path], Optional[str]]:
+    def process(
+        self,
+        input_source: str,
+        source_type: str = "file",
+        temp_files: Optional[List[Path]] = None,
+    ) -> Tuple[Optional[Path], Optional[str]]:
         """
         Process video input (file path or URL).
         
         Args:
             input_source: File path or URL
             source_type: "file" or "url"
+            temp_files: Optional list that receives extra temp files to clean up
         
         Returns:
             Tuple of (temp_file_path, error_message)
         """
         if source_type == "url":
-            return self.download_from_url(input_source)
+            return self.download_from_url(input_source, temp_files)
         elif source_type == "file":
             return self.process_local_file(input_source)
         else:
@@ -1,13 +1,73 @@
 """
 Video segmentation service for keyframe and audio extraction
 """
+import multiprocessing
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict, Any
 from src.utils.config import Config
 from src.utils.file_utils import get_temp_file_path, generate_unique_filename
 
 
+# Whisper model loaded inside each worker process that transcribes.
+_WHISPER_MODEL = None
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def _transcribe_in_worker(audio_path: str) -> Dict[str, Any]:
+    """
+    Transcribe audio inside a worker process.
+
+    Runs in the segmenter process pool so Whisper's CPU work does not
+    hold the API process's GIL. The model is loaded once per worker and
+    reused for every later reel.
+    """
+    global _WHISPER_MODEL
+    import whisper
+    
+    if _WHISPER_MODEL is None:
+        # Load Whisper model (base model for speed)
+        print("🎤 Loading Whisper model for transcription...")
+        _WHISPER_MODEL = whisper.load_model("base")
+    
+    print("🎤 Transcribing audio...")
+    result = _WHISPER_MODEL.transcribe(audio_path)
+    return {
+        "text": result["text"],
+        "segments": result.get("segments", []),
+        "language": result.get("language", "unknown")
+    }
+
+
+def _hash_keyframes_in_worker(frame_paths: List[str]) -> List[Optional[int]]:
+    """
+    Perceptual hashes for a reel's keyframes, computed inside a worker process.
+
+    Decoding, resizing and DCT-ing every frame is the CPU-heavy part of
+    deduplication, so it runs off the API process's GIL.
+    """
+    return [VideoSegmenter._phash(Path(path)) for path in frame_paths]
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Lazily create the process pool shared by all segmenters.
+
+    It runs the CPU-bound segmentation work: keyframe hashing for
+    deduplication and Whisper transcription. Workers are spawned rather
+    than forked: the API process is already multithreaded by then, and a
+    forked child can deadlock on a lock some other thread held at fork time.
+    """
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        _PROCESS_POOL = ProcessPoolExecutor(
+            max_workers=Config.SEGMENTER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _PROCESS_POOL
+
+
 class VideoSegmenter:
     """
     Service to segment videos into keyframes and extract audio.
@@ -139,6 +199,104 @@ class VideoSegmenter:
         except Exception as e:
             return [], f"Error extracting keyframes: {str(e)}"
     
+    @staticmethod
+    def limit_keyframes(keyframes: List[Path], max_keyframes: int) -> List[Path]:
+        """
+        Keep at most `max_keyframes` frames spread evenly across the video.
+        
+        The first and last frames are always kept; the rest are deleted
+        from temp storage.
+        """
+        if len(keyframes) <= max_keyframes:
+            return keyframes
+        if max_keyframes == 1:
+            keep = {0}
+        else:
+            step = (len(keyframes) - 1) / (max_keyframes - 1)
+            keep = {round(i * step) for i in range(max_keyframes)}
+        
+        kept = []
+        for idx, frame in enumerate(keyframes):
+            if idx in keep:
+                kept.append(frame)
+            else:
+                frame.unlink(missing_ok=True)
+        return kept
+    
+    @staticmethod
+    def _phash(image_path: Path) -> Optional[int]:
+        """
+        64-bit perceptual hash (DCT of a 32x32 grayscale thumbnail).
+        
+        Returns None if the frame cannot be read.
+        """
+        import cv2
+        import numpy as np
+        
+        image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return None
+        small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA)
+        low_freq = cv2.dct(np.float32(small))[:8, :8].flatten()
+        bits = low_freq > np.median(low_freq)
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+    
+    def dedupe_keyframes(
+        self,
+        keyframes: List[Path],
+        max_distance: Optional[int] = None
+    ) -> List[Path]:
+        """
+        Drop near-identical keyframes (e.g. static talking-head shots).
+        
+        Frames are kept greedily in order; a frame is dropped when its
+        perceptual hash is within `max_distance` bits of any frame already
+        kept. Dropped files are deleted from temp storage.
+        
+        Args:
+            keyframes: Keyframe paths in chronological order
+            max_distance: Hamming distance treated as a duplicate (default from config)
+        
+        Returns:
+            The kept keyframe paths, still in chronological order
+        """
+        if max_distance is None:
+            max_distance = Config.KEYFRAME_DEDUPE_DISTANCE
+        if len(keyframes) < 2 or max_distance < 0:
+            return keyframes
+        
+        try:
+            import numpy as np
+            hashes = _get_process_pool().submit(
+                _hash_keyframes_in_worker, [str(frame) for frame in keyframes]
+            ).result()
+        except ImportError:
+            # OpenCV / NumPy unavailable: keep every frame
+            return keyframes
+        except Exception as e:
+            print(f"⚠️  Keyframe hashing failed ({e}); keeping every frame")
+            return keyframes
+        
+        kept: List[Path] = []
+        kept_hashes = np.zeros(len(keyframes), dtype=np.uint64)
+        hashed = 0
+        for frame, frame_hash in zip(keyframes, hashes):
+            if frame_hash is None:
+                kept.append(frame)
+                continue
+            if hashed:
+                # Vectorized popcount of XOR against every kept hash at once
+                xor = np.bitwise_xor(kept_hashes[:hashed], np.uint64(frame_hash))
+                distances = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+                if distances.min() <= max_distance:
+                    frame.unlink(missing_ok=True)
+                    continue
+            kept_hashes[hashed] = frame_hash
+            hashed += 1
+            kept.append(frame)
+        
+        return kept
+    
     def extract_audio(self, video_path: Path) -> Tuple[Optional[Path], Optional[str]]:
         """
         Extract audio track from video.
@@ -184,6 +342,8 @@ class VideoSegmenter:
         """
         Transcribe audio to text using Whisper.
         
+        The work runs in a separate process (see `_transcribe_in_worker`).
+        
         Args:
             audio_path: Path to audio file
         
@@ -191,22 +351,10 @@ class VideoSegmenter:
             Tuple of (transcript dict, error_message)
         """
         try:
-            import whisper
-            
-            # Load Whisper model (base model for speed)
-            # This might take a moment on first run
-            print("🎤 Loading Whisper model for transcription...")
-            model = whisper.load_model("base")
-            
-            # Transcribe audio
-            print("🎤 Transcribing audio...")
-            result = model.transcribe(str(audio_path))
-            
-            return {
-                "text": result["text"],
-                "segments": result.get("segments", []),
-                "language": result.get("language", "unknown")
-            }, None
+            transcript = _get_process_pool().submit(
+                _transcribe_in_worker, str(audio_path)
+            ).result()
+            return transcript, None
             
         except ImportError:
             return None, "Whisper not installed. Install with: pip install openai-whisper"
@@ -217,21 +365,75 @@ class VideoSegmenter:
                 return None, "Whisper transcription failed due to NumPy compatibility. Continuing without transcript. (This is optional)"
             return None, f"Error transcribing audio: {error_msg}"
     
+    def _extract_audio_and_transcript(
+        self,
+        video_path: Path,
+        transcribe: bool
+    ) -> Dict[str, Any]:
+        """
+        Extract audio and, if requested, transcribe it.
+        
+        Runs as one unit so transcription starts as soon as the audio track
+        is ready, independently of keyframe extraction.
+        
+        Returns:
+            Dictionary with audio_path, transcript and errors
+        """
+        result = {
+            "audio_path": None,
+            "transcript": None,
+            "errors": []
+        }
+        
+        audio_path, error = self.extract_audio(video_path)
+        if error:
+            result["errors"].append(f"Audio extraction: {error}")
+            return result
+        result["audio_path"] = audio_path
+        
+        # Transcribe audio (only if requested and if whisper is available)
+        if transcribe and audio_path:
+            try:
+                # Try to import whisper - if it fails, skip transcription
+                import whisper
+                transcript, transcribe_error = self.transcribe_audio(audio_path)
+                if transcribe_error:
+                    # Transcription is optional, so we log it but don't fail
+                    result["errors"].append(f"Transcription: {transcribe_error}")
+                    print(f"⚠️  {transcribe_error}")
+                    print("ℹ️  Continuing without audio transcript...")
+                else:
+                    result["transcript"] = transcript
+                    print("✓ Audio transcribed successfully")
+            except (ImportError, Exception) as e:
+                # Whisper not available or NumPy issue - skip transcription
+                result["errors"].append(f"Transcription skipped: {str(e)[:100]}")
+                print(f"⚠️  Audio transcription skipped (Whisper/NumPy issue)")
+                print("ℹ️  Continuing without audio transcript...")
+        
+        return result
+    
     def segment_video(
         self, 
         video_path: Path,
         extract_keyframes: bool = True,
         extract_audio: bool = True,
-        transcribe: bool = True
+        transcribe: bool = True,
+        max_keyframes: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Segment video into keyframes and audio.
         
+        Keyframe extraction and audio extraction + transcription are
+        independent, so when both are requested they run concurrently and
+        the stage takes max(keyframes, audio + transcribe) instead of the sum.
+        
         Args:
             video_path: Path to video file
             extract_keyframes: Whether to extract keyframes
             extract_audio: Whether to extract audio
             transcribe: Whether to transcribe audio
+            max_keyframes: Keep at most this many keyframes, evenly spaced (optional)
         
         Returns:
             Dictionary with keyframes, audio, and transcript
@@ -243,41 +445,31 @@ class VideoSegmenter:
             "errors": []
         }
         
-        # Extract keyframes
-        if extract_keyframes:
-            keyframes, error = self.extract_keyframes(video_path)
-            if error:
-                result["errors"].append(f"Keyframe extraction: {error}")
-            else:
-                result["keyframes"] = keyframes
-        
-        # Extract audio
-        if extract_audio:
-            audio_path, error = self.extract_audio(video_path)
-            if error:
-                result["errors"].append(f"Audio extraction: {error}")
-            else:
-                result["audio_path"] = audio_path
-                
-                # Transcribe audio (only if requested and if whisper is available)
-                if transcribe and audio_path:
-                    try:
-                        # Try to import whisper - if it fails, skip transcription
-                        import whisper
-                        transcript, transcribe_error = self.transcribe_audio(audio_path)
-                        if transcribe_error:
-                            # Transcription is optional, so we log it but don't fail
-                            result["errors"].append(f"Transcription: {transcribe_error}")
-                            print(f"⚠️  {transcribe_error}")
-                            print("ℹ️  Continuing without audio transcript...")
-                        else:
-                            result["transcript"] = transcript
-                            print("✓ Audio transcribed successfully")
-                    except (ImportError, Exception) as e:
-                        # Whisper not available or NumPy issue - skip transcription
-                        result["errors"].append(f"Transcription skipped: {str(e)[:100]}")
-                        print(f"⚠️  Audio transcription skipped (Whisper/NumPy issue)")
-                        print("ℹ️  Continuing without audio transcript...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            keyframes_future = (
+                pool.submit(self.extract_keyframes, video_path) if extract_keyframes else None
+            )
+            audio_future = (
+                pool.submit(self._extract_audio_and_transcript, video_path, transcribe)
+                if extract_audio else None
+            )
+            
+            # Extract keyframes
+            if keyframes_future is not None:
+                keyframes, error = keyframes_future.result()
+                if error:
+                    result["errors"].append(f"Keyframe extraction: {error}")
+                else:
+                    keyframes = self.dedupe_keyframes(keyframes)
+                    if max_keyframes:
+                        keyframes = self.limit_keyframes(keyframes, max_keyframes)
+                    result["keyframes"] = keyframes
+            
+            # Extract audio (+ transcript)
+            if audio_future is not None:
+                audio = audio_future.result()
+                result["audio_path"] = audio["audio_path"]
+                result["transcript"] = audio["transcript"]
+                result["errors"].extend(audio["errors"])
         
         return result
-
@@ -29,23 +29,48 @@ class Config:
     # Slightly higher default interval to reduce processing time and uploads.
     # Can be overridden via KEYFRAME_INTERVAL_SECONDS env var.
     KEYFRAME_INTERVAL_SECONDS: int = int(os.getenv("KEYFRAME_INTERVAL_SECONDS", "5"))
+    # Keyframes whose perceptual hashes differ by at most this many bits are
+    # treated as duplicates and dropped (-1 disables deduplication).
+    KEYFRAME_DEDUPE_DISTANCE: int = int(os.getenv("KEYFRAME_DEDUPE_DISTANCE", "10"))
     MAX_VIDEO_DURATION_MINUTES: int = int(os.getenv("MAX_VIDEO_DURATION_MINUTES", "5"))
+    # Worker processes for CPU-bound segmentation (keyframe hashing, Whisper
+    # transcription; each transcribing worker holds its own model).
+    SEGMENTER_WORKERS: int = int(os.getenv("SEGMENTER_WORKERS", "2"))
+    # Reels the API extracts at once; further submissions wait in the queue.
+    EXTRACTION_WORKERS: int = int(os.getenv("EXTRACTION_WORKERS", "2"))
+    # Queued + running extractions beyond which /submit answers 429.
+    MAX_PENDING_EXTRACTIONS: int = int(os.getenv("MAX_PENDING_EXTRACTIONS", "50"))
+    # Threads for sync work in the API (static keyframe files, sync
+    # dependencies); Starlette's default is 40.
+    FASTAPI_THREAD_LIMIT: int = int(os.getenv("FASTAPI_THREAD_LIMIT", "128"))
+    # Concurrent /search, /recent and /document requests; more get 503.
+    MAX_CONCURRENT_LOOKUPS: int = int(os.getenv("MAX_CONCURRENT_LOOKUPS", "50"))
     
     # Storage Configuration
     TEMP_STORAGE_PATH: Path = Path(os.getenv("TEMP_STORAGE_PATH", "./temp_storage"))
     CLEANUP_AFTER_HOURS: int = int(os.getenv("CLEANUP_AFTER_HOURS", "24"))
     
+    # Set once validate()/ensure_temp_storage() have succeeded, so repeated
+    # calls (every service constructor, every temp file path) are free.
+    _validated: bool = False
+    _temp_storage_ready: bool = False
+    
     @classmethod
     def validate(cls) -> bool:
         """Validate that required configuration is present"""
+        if cls._validated:
+            return True
         if not cls.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY is required in .env file")
         if not cls.SUPERMEMEORY_API_KEY:
             raise ValueError("SUPERMEMEORY_API_KEY is required in .env file")
+        cls._validated = True
         return True
     
     @classmethod
     def ensure_temp_storage(cls):
         """Ensure temporary storage directory exists"""
+        if cls._temp_storage_ready:
+            return
         cls.TEMP_STORAGE_PATH.mkdir(parents=True, exist_ok=True)
-
+        cls._temp_storage_ready = True
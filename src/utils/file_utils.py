@@ -21,7 +21,7 @@ def generate_unique_filename(original_filename: str, extension: Optional[str] =
     """
     if extension is None:
         extension = Path(original_filename).suffix
-    unique_id = str(uuid.uuid4())
+    unique_id = uuid.uuid4().hex
     return f"{unique_id}{extension}"
 
 
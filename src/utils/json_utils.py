@@ -0,0 +1,57 @@
+"""
+Fast JSON helpers for Gemini / Supermemory payloads.
+
+Uses orjson when it is installed (several times faster on the large
+extraction + keyframe payloads) and falls back to the standard library.
+Decode errors are always `json.JSONDecodeError` subclasses, so callers can
+keep catching that.
+"""
+import json
+from datetime import date, time
+from typing import Any, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document from str or bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _default(value: Any) -> str:
+    """Encode values JSON cannot represent: ISO 8601 for dates (as orjson does), else str()."""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON bytes, ready to send as a response body.
+
+    Values JSON cannot represent (datetimes, paths, ...) are written as in `dumps`.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=str, option=option)
+    return dumps(obj, sort_keys=sort_keys).encode("utf-8")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """
+    Serialize to a compact JSON string.
+
+    Dates and times are written in ISO 8601; other values JSON cannot
+    represent (paths, ...) are written with str().
+    """
+    if ORJSON_AVAILABLE:
+        return dumps_bytes(obj, sort_keys=sort_keys).decode("utf-8")
+    return json.dumps(obj, sort_keys=sort_keys, default=_default, separators=(",", ":"))
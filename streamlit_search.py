@@ -1,5 +1,7 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
 from dotenv import load_dotenv
 import json
@@ -13,6 +15,27 @@ load_dotenv()
 API_URL = "https://api.supermemory.ai/v3/search"
 DOCUMENT_API_URL = "https://api.supermemory.ai/v3/documents"
 API_KEY = os.environ.get("SUPERMEMORY_API_KEY") or ""
+SM_HEADERS = {
+    "Authorization": f"Bearer {API_KEY}",
+    "Content-Type": "application/json",
+}
+
+# One pooled keep-alive session for every Supermemory call, so a document
+# plus its keyframe search reuse the same TLS connection.
+SM_SESSION = requests.Session()
+SM_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,  # search is a read-only POST, so retry it too
+        ),
+    ),
+)
 
 
 def call_search_api(query: str):
@@ -21,13 +44,8 @@ def call_search_api(query: str):
         return None
 
     payload = {"q": query, "chunkThreshold": 0.7}
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-    }
-
     try:
-        resp = requests.post(API_URL, json=payload, headers=headers, timeout=30)
+        resp = SM_SESSION.post(API_URL, json=payload, headers=SM_HEADERS, timeout=30)
         resp.raise_for_status()
         return resp.json()
     except requests.RequestException as e:
@@ -42,13 +60,8 @@ def call_document_api(document_id: str):
         return None
 
     url = f"{DOCUMENT_API_URL}/{document_id}"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-    }
-
     try:
-        resp = requests.get(url, headers=headers, timeout=30)
+        resp = SM_SESSION.get(url, headers=SM_HEADERS, timeout=30)
         resp.raise_for_status()
         return resp.json()
     except requests.RequestException as e:
@@ -98,13 +111,8 @@ def get_document_with_keyframes(document_id: str, custom_id: str = None):
         }
     }
     
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-    }
-    
     try:
-        resp = requests.post(API_URL, json=search_payload, headers=headers, timeout=30)
+        resp = SM_SESSION.post(API_URL, json=search_payload, headers=SM_HEADERS, timeout=30)
         resp.raise_for_status()
         search_results = resp.json()
         